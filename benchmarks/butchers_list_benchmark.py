@@ -0,0 +1,57 @@
+"""
+Benchmark for the butchers list invoice processing.
+
+Run from the project root:
+    python -m benchmarks.butchers_list_benchmark
+"""
+import random
+import time
+
+from utils.butchers_list_utils import process_invoices_products
+
+
+def make_sage_payload(invoice_count, lines_per_invoice, fresh_codes):
+    """Build synthetic searchInvoice / searchInvoiceItem results."""
+    invoices = []
+    invoice_items = []
+
+    for number in range(1, invoice_count + 1):
+        invoice_number = str(100000 + number)
+        invoices.append({
+            "invoiceNumber": invoice_number,
+            "name": f"Customer {number % 250}",
+            "contactName": "",
+            "accountRef": f"CUST{number % 250:04d}",
+        })
+        for _ in range(lines_per_invoice):
+            stock_code = random.choice(fresh_codes)
+            invoice_items.append({
+                "invoiceNumber": invoice_number,
+                "stockCode": stock_code,
+                "description": f"Product {stock_code}",
+                "quantity": random.randint(1, 20),
+            })
+
+    # Sage doesn't return items grouped by invoice
+    random.shuffle(invoice_items)
+    return invoices, invoice_items
+
+
+def run(invoice_count, lines_per_invoice):
+    fresh_codes = [f"ZPO{i}" for i in range(200)]
+    invoices, invoice_items = make_sage_payload(invoice_count, lines_per_invoice, fresh_codes)
+
+    start = time.perf_counter()
+    butchers_list = process_invoices_products(invoice_items, set(fresh_codes), invoices)
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{invoice_count:>6} invoices, {len(invoice_items):>7} lines -> "
+        f"{len(butchers_list):>4} customers in {elapsed:.3f}s"
+    )
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    for invoice_count, lines_per_invoice in [(300, 40), (1000, 20), (2500, 20)]:
+        run(invoice_count, lines_per_invoice)
@@ -0,0 +1,87 @@
+"""
+Benchmark for building the MPP report from a week of Sage data.
+
+Run from the project root:
+    python -m benchmarks.mpp_report_benchmark
+"""
+import json
+import random
+import time
+
+from models.product import Product
+from utils.mpp_report_utils import (
+    build_unit_of_measurement_index, group_customer_invoices,
+    group_invoice_items, get_customer_invoice_items
+)
+
+
+def make_products(product_count):
+    products = []
+    for number in range(product_count):
+        # Mix of JSON arrays and plain codes, as stored in products.sage_code
+        if number % 3:
+            sage_code = json.dumps([f"ZPO{number}", f"ZPO{number}A"])
+        else:
+            sage_code = f"ZPO{number}"
+        products.append(Product(
+            number, f"Product {number}", 1.0, 0, 2.0, "Fresh", "Beef",
+            sage_code, "Supplier", random.choice(["kg", "each", "box"])
+        ))
+    return products
+
+
+def make_sage_payload(customer_count, invoices_per_customer, lines_per_invoice, stock_codes):
+    """Build synthetic searchInvoice / searchInvoiceItem results for a week."""
+    customers = [{"sage_code": f"CUST{number:04d}"} for number in range(customer_count)]
+    invoices = []
+    invoice_items = []
+
+    invoice_number = 100000
+    for customer in customers:
+        for _ in range(invoices_per_customer):
+            invoice_number += 1
+            invoices.append({
+                "invoiceNumber": str(invoice_number),
+                "invoiceDate": "2025-01-01",
+                "accountRef": customer["sage_code"],
+            })
+            for _ in range(lines_per_invoice):
+                stock_code = random.choice(stock_codes)
+                invoice_items.append({
+                    "invoiceNumber": str(invoice_number),
+                    "stockCode": stock_code,
+                    "description": f"Product {stock_code}",
+                    "unitPrice": 5.0,
+                    "quantity": random.randint(1, 20),
+                    "netAmount": 50.0,
+                })
+
+    random.shuffle(invoice_items)
+    return customers, invoices, invoice_items
+
+
+def run(customer_count, invoices_per_customer, lines_per_invoice, product_count=600):
+    products = make_products(product_count)
+    stock_codes = [f"ZPO{number}" for number in range(product_count)]
+    customers, invoices, invoice_items = make_sage_payload(
+        customer_count, invoices_per_customer, lines_per_invoice, stock_codes
+    )
+
+    start = time.perf_counter()
+    unit_of_measurement_index = build_unit_of_measurement_index(products)
+    customer_invoices, _ = group_customer_invoices(invoices, customers)
+    items_by_invoice = group_invoice_items(invoice_items)
+    report = get_customer_invoice_items(items_by_invoice, customer_invoices, customers, unit_of_measurement_index)
+    elapsed = time.perf_counter() - start
+
+    line_count = sum(len(invoice["invoice_items"]) for customer in report for invoice in customer["data"])
+    print(
+        f"{customer_count:>4} customers, {len(invoices):>5} invoices, {len(invoice_items):>6} lines -> "
+        f"{line_count:>6} report lines in {elapsed:.3f}s"
+    )
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    for customer_count, invoices_per_customer, lines_per_invoice in [(20, 5, 15), (100, 7, 20), (400, 7, 20)]:
+        run(customer_count, invoices_per_customer, lines_per_invoice)
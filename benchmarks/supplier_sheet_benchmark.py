@@ -0,0 +1,65 @@
+"""
+Benchmark for updating a supplier price sheet from Sage prices.
+
+Run from the project root:
+    python -m benchmarks.supplier_sheet_benchmark
+"""
+import random
+import time
+
+import pandas as pd
+
+from resources.update_supplier_excel import PRICE_COLUMNS, apply_prices, get_sage_codes
+
+
+def make_sheet(row_count, stock_codes):
+    """Build a supplier sheet, with some blank and unknown stock codes mixed in."""
+    codes = []
+    for number in range(row_count):
+        roll = random.random()
+        if roll < 0.02:
+            codes.append(None)
+        elif roll < 0.05:
+            codes.append(f"UNKNOWN{number}")
+        else:
+            codes.append(random.choice(stock_codes))
+
+    sheet = {
+        "Stock Code": codes,
+        "Description": [f"Line {number}" for number in range(row_count)],
+    }
+    for col in PRICE_COLUMNS:
+        sheet[col] = [round(random.uniform(1, 50), 2) for _ in range(row_count)]
+    return pd.DataFrame(sheet)
+
+
+def make_sage_products(stock_codes):
+    """Build searchProduct results, a few without a usable price."""
+    products = []
+    for stock_code in stock_codes:
+        sales_price = None if random.random() < 0.01 else f"{random.uniform(1, 50):.4f}"
+        products.append({"stockCode": stock_code, "salesPrice": sales_price})
+    return products
+
+
+def run(row_count, product_count=5000):
+    stock_codes = [f"ZPO{number}" for number in range(product_count)]
+    df = make_sheet(row_count, stock_codes)
+    products = make_sage_products(stock_codes)
+
+    start = time.perf_counter()
+    codes = get_sage_codes(df)
+    updated = apply_prices(df, products)
+    elapsed = time.perf_counter() - start
+
+    flagged = int((updated["Comments"] == "NIS").sum()) if "Comments" in updated.columns else 0
+    print(
+        f"{row_count:>6} rows, {len(codes):>5} unique codes, {product_count:>5} Sage products -> "
+        f"{flagged:>5} flagged NIS in {elapsed:.3f}s"
+    )
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    for row_count in [1000, 10000, 50000]:
+        run(row_count)
@@ -1,93 +1,65 @@
 import json
-import os
-import socket
 import requests
-import urllib3  # Add this import
-from dotenv import load_dotenv
 
-# Disable InsecureRequestWarning
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from controllers.sage_controllers.response_cache import is_past_date
+from controllers.sage_controllers.sage_client import fetch_in_chunks, get_sage_client
 
-# Load environment variables from .env
-load_dotenv()
 
-def is_internal_network():
+def iter_invoice_items(payload, historical=False):
     """
-    Check if we're likely running on the internal network by testing if we can
-    resolve the internal hostname quickly.
+    Yield searchInvoiceItem results one page at a time.
     """
-    try:
-        # Try to resolve the internal server hostname with a short timeout
-        socket.getaddrinfo('server69.cw-direct.co.uk', 50027)
-        return True
-    except (socket.gaierror, socket.timeout):
-        return False
-    finally:
-        # Reset socket timeout to default
-        socket.setdefaulttimeout(None)
+    return get_sage_client().paginate("/api/searchInvoiceItem/", payload, historical=historical)
 
 
-def get_api_url():
+def fetch_invoice_items_chunk(invoices_ids, historical=False):
     """
-    Function to get the API URL with fallback support.
-    Detects whether we're on internal or external network to choose 
-    the appropriate connection route.
+    Fetch every item for one chunk of invoice numbers.
     """
-    # Get configured URLs from environment
-    internal_url = os.getenv("SAGE_API_URL_INTERNAL") or os.environ.get("SAGE_API_URL_INTERNAL")
-    external_url = os.getenv("SAGE_API_URL") or os.environ.get("SAGE_API_URL")
-    
-    # Define direct internal server connection as backup option
-    # direct_internal = "https://10.0.0.69:50027"  # Direct IP to SERVER69
-    
-    # If we're likely on the internal network, prioritize internal connections
-    if is_internal_network():
-        print("Detected internal network, prioritizing direct internal connection")
-        return internal_url
-    else:
-        print("Detected external network, prioritizing external connection")
-        return external_url
-
-
-API_URL = get_api_url()
-API_TOKEN = os.getenv("SAGE_API_TOKEN")
-
-
-if not API_TOKEN:
-    API_TOKEN = os.environ.get("API_TOKEN")
-
-
-def get_invoice_items_id(invoices_ids):
-    """
-    Fetch a specific invoice by its ID from the Sage API.
-    """
-    if not API_URL or not API_TOKEN:
-        raise ValueError("Missing SAGE_API_URL or SAGE_API_TOKEN in environment variables.")
-    
-    url = f"{API_URL}/api/searchInvoiceItem/"
-
-    payload = json.dumps([
+    payload = [
       {
         "field": "INVOICE_NUMBER",
         "type": "in",
         "value": invoices_ids
       }
-    ])
-    headers = {
-      'Content-Type': 'application/json',
-      'AuthToken': API_TOKEN
-    }
+    ]
+    return list(iter_invoice_items(payload, historical))
 
-    try:
-        if is_internal_network():
-            response = requests.request("POST", url, headers=headers, data=payload, verify=False)
-        else:
-            response = requests.request("POST", url, headers=headers, data=payload)
-        response.raise_for_status()  # Raise an error for non-2xx responses
 
-        invoice_items = response.json()
-        print(f"Fetch in controller completed successfully: {len(invoice_items['results'])}")
-        return invoice_items['results']
+def iter_invoice_items_id(invoices_ids, chunk_size=None, max_workers=None, on_progress=None, invoices_date=None):
+    """
+    Stream the items of the given invoices from the Sage API.
+    The invoice numbers are de-duplicated and split into chunks that are
+    fetched concurrently, and each chunk's items are yielded as it lands.
+    Every invoice is in exactly one chunk, so no item comes back twice.
+    on_progress(done, total) is called as every chunk lands.
+    invoices_date is the latest date of the invoices, when it's before today
+    their items can't change any more and are cached with no expiry.
+    """
+    client = get_sage_client()
+    unique_ids = list(dict.fromkeys(invoices_ids or []))
+    historical = is_past_date(invoices_date)
+
+    for chunk_number, chunk_count, invoice_items in fetch_in_chunks(
+        lambda chunk: fetch_invoice_items_chunk(chunk, historical),
+        unique_ids,
+        chunk_size or client.chunk_size,
+        max_workers or client.max_workers,
+        label="invoice items chunk"
+    ):
+        if on_progress:
+            on_progress(chunk_number, chunk_count)
+        yield from invoice_items
+
+
+def get_invoice_items_id(invoices_ids, on_progress=None, invoices_date=None):
+    """
+    Fetch a specific invoice by its ID from the Sage API.
+    """
+    try:
+        invoice_items = list(iter_invoice_items_id(invoices_ids, on_progress=on_progress, invoices_date=invoices_date))
+        print(f"Fetch in controller completed successfully: {len(invoice_items)}")
+        return invoice_items
 
     except requests.RequestException as e:
         print(f"Error fetching invoice items: {e}")
@@ -98,12 +70,7 @@ def get_invoice_items_date_sage_code(date, product_sage_codes):
     """
     Fetch a specific invoice by its ID from the Sage API.
     """
-    if not API_URL or not API_TOKEN:
-        raise ValueError("Missing SAGE_API_URL or SAGE_API_TOKEN in environment variables.")
-    
-    url = f"{API_URL}/api/searchInvoiceItem/"
-
-    payload = json.dumps([
+    payload = [
       {
         "field": "RECORD_CREATE_DATE",
         "type": "eq",
@@ -114,22 +81,12 @@ def get_invoice_items_date_sage_code(date, product_sage_codes):
         "type": "in",
         "value": product_sage_codes
       }
-    ])
-    headers = {
-      'Content-Type': 'application/json',
-      'AuthToken': API_TOKEN
-    }
+    ]
 
     try:
-        if is_internal_network():
-            response = requests.request("POST", url, headers=headers, data=payload, verify=False)
-        else:
-            response = requests.request("POST", url, headers=headers, data=payload)
-        response.raise_for_status()  # Raise an error for non-2xx responses
-
-        invoice_items = response.json()
-        print(f"Fetch in controller completed successfully: {len(invoice_items['results'])}")
-        return invoice_items['results']
+        invoice_items = list(iter_invoice_items(payload))
+        print(f"Fetch in controller completed successfully: {len(invoice_items)}")
+        return invoice_items
 
     except requests.RequestException as e:
         print(f"Error fetching invoice items: {e}")
@@ -139,12 +96,7 @@ def get_invoice_items_between_time_frame(date, previous_week_date):
     """
     Fetch a specific invoice by its ID from the Sage API.
     """
-    if not API_URL or not API_TOKEN:
-        raise ValueError("Missing SAGE_API_URL or SAGE_API_TOKEN in environment variables.")
-    
-    url = f"{API_URL}/api/searchInvoiceItem/"
-
-    payload = json.dumps([
+    payload = [
       {
         "field": "RECORD_CREATE_DATE",
         "type": "lte",
@@ -155,22 +107,12 @@ def get_invoice_items_between_time_frame(date, previous_week_date):
         "type": "gte",
         "value": previous_week_date
       }
-    ])
-    headers = {
-      'Content-Type': 'application/json',
-      'AuthToken': API_TOKEN
-    }
+    ]
 
     try:
-        if is_internal_network():
-            response = requests.request("POST", url, headers=headers, data=payload, verify=False)
-        else:
-            response = requests.request("POST", url, headers=headers, data=payload)
-        response.raise_for_status()  # Raise an error for non-2xx responses
-
-        invoice_items = response.json()
-        print(f"Fetch in controller completed successfully: {len(invoice_items['results'])}")
-        return invoice_items['results']
+        invoice_items = list(iter_invoice_items(payload))
+        print(f"Fetch in controller completed successfully: {len(invoice_items)}")
+        return invoice_items
 
     except requests.RequestException as e:
         print(f"Error fetching invoice items: {e}")
@@ -1,128 +1,68 @@
-from itertools import chain
-import json
-import os
-import socket
 import requests
-from datetime import date, datetime
-from dotenv import load_dotenv
-from collections import defaultdict
-import urllib3
 
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-from database.butchers_lists import fetch_butchers_list_by_date
-from database.products import fetch_products_stock_code_fresh
-from models.butchers_list import ButchersList
-
-# Load environment variables from .env
-load_dotenv()
-
-def is_internal_network():
-    """
-    Check if we're likely running on the internal network by testing if we can
-    resolve the internal hostname quickly.
-    """
-    try:
-        # Try to resolve the internal server hostname with a short timeout
-        socket.getaddrinfo('server69.cw-direct.co.uk', 50027)
-        return True
-    except (socket.gaierror, socket.timeout):
-        return False
-    finally:
-        # Reset socket timeout to default
-        socket.setdefaulttimeout(None)
-
-def get_api_url():
-    """
-    Function to get the API URL with fallback support.
-    Detects whether we're on internal or external network to choose 
-    the appropriate connection route.
-    """
-    # Get configured URLs from environment
-    internal_url = os.getenv("SAGE_API_URL_INTERNAL") or os.environ.get("SAGE_API_URL_INTERNAL")
-    external_url = os.getenv("SAGE_API_URL") or os.environ.get("SAGE_API_URL")
-    
-    # Define direct internal server connection as backup option
-    # direct_internal = "https://10.0.0.69:50027"  # Direct IP to SERVER69
-    
-    # If we're likely on the internal network, prioritize internal connections
-    if is_internal_network():
-        print("Detected internal network, prioritizing direct internal connection")
-        return internal_url
-    else:
-        print("Detected external network, prioritizing external connection")
-        return external_url
-
-
-API_URL = get_api_url()
-API_TOKEN = os.getenv("SAGE_API_TOKEN")
-
-
-if not API_TOKEN:
-    API_TOKEN = os.environ.get("API_TOKEN")
+from controllers.sage_controllers.sage_client import fetch_in_chunks, get_sage_client
 
 
 def get_product_by_code(sage_code):
     """
     Fetch a specific invoice by its ID from the Sage API.
     """
-    if not API_URL or not API_TOKEN:
-        raise ValueError("Missing SAGE_API_URL or SAGE_API_TOKEN in environment variables.")
-    
-    url = f"{API_URL}/api/product/{sage_code}"
-
-    payload = ""
-    headers = {
-      'Content-Type': 'application/json',
-      'AuthToken': API_TOKEN
-    }
-
     try:
-        if is_internal_network():
-            response = requests.request("GET", url, headers=headers, data=payload, verify=False)
-        else:
-            response = requests.request("GET", url, headers=headers, data=payload)
-        response.raise_for_status()  # Raise an error for non-2xx responses
-
-        product = response.json()
+        product = get_sage_client().get(f"/api/product/{sage_code}")
         return product
 
     except requests.RequestException as e:
         print(f"Error fetching invoice: {e}")
         return None
     
-def get_products_by_codes(sage_codes):
+def fetch_products_chunk(sage_codes):
     """
-    Fetch a specific invoice by its ID from the Sage API.
+    Fetch the products for one chunk of stock codes.
     """
-    if not API_URL or not API_TOKEN:
-        raise ValueError("Missing SAGE_API_URL or SAGE_API_TOKEN in environment variables.")
-    
-    url = f"{API_URL}/api/searchProduct"
-
-    payload = json.dumps([
+    payload = [
       {
         "field": "STOCK_CODE",
         "type": "in",
         "value": sage_codes
       }
-    ])
-    headers = {
-      'Content-Type': 'application/json',
-      'AuthToken': API_TOKEN
-    }
+    ]
+    # Prices are read straight from Sage, not from the response cache
+    return get_sage_client().post("/api/searchProduct", payload).get("results") or []
 
-    try:
-        if is_internal_network():
-            response = requests.request("POST", url, headers=headers, data=payload, verify=False)
-        else:
-            response = requests.request("POST", url, headers=headers, data=payload)
-        response.raise_for_status()  # Raise an error for non-2xx responses
 
-        products = response.json()
-        return products["results"]
+def iter_products_by_codes(sage_codes, chunk_size=None, max_workers=None, on_progress=None, failed=None):
+    """
+    Stream the products for the given stock codes from the Sage API.
+    The codes are de-duplicated and fetched concurrently in chunks, each
+    chunk retried on its own. on_progress(done, total) is called as every
+    chunk lands, and failed collects chunks that never succeeded (see
+    fetch_in_chunks).
+    """
+    client = get_sage_client()
+    unique_codes = list(dict.fromkeys(sage_codes or []))
+
+    for chunk_number, chunk_count, products in fetch_in_chunks(
+        fetch_products_chunk,
+        unique_codes,
+        chunk_size or client.chunk_size,
+        max_workers or client.max_workers,
+        label="products chunk",
+        retries=client.chunk_retries,
+        backoff_factor=client.backoff_factor,
+        failed=failed
+    ):
+        if on_progress:
+            on_progress(chunk_number, chunk_count)
+        yield from products
+
+
+def get_products_by_codes(sage_codes, on_progress=None, failed=None):
+    """
+    Fetch the products for a list of stock codes from the Sage API.
+    """
+    try:
+        return list(iter_products_by_codes(sage_codes, on_progress=on_progress, failed=failed))
 
     except requests.RequestException as e:
-        print(f"Error fetching invoice: {e}")
+        print(f"Error fetching products: {e}")
         return None
-
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import date, datetime
+
+# Filter fields that pin a Sage search to a date
+DATE_FIELDS = ("INVOICE_DATE", "RECORD_CREATE_DATE")
+UPPER_BOUND_TYPES = ("eq", "lt", "lte")
+
+
+def get_cache_path():
+    """Default location of the cache database, outside the PyInstaller bundle."""
+    configured_path = os.getenv("SAGE_CACHE_PATH") or os.environ.get("SAGE_CACHE_PATH")
+    if configured_path:
+        return configured_path
+    return os.path.join(os.path.expanduser("~"), ".managemestock", "sage_cache.sqlite3")
+
+
+def normalize_filters(payload):
+    """
+    Put a Sage filter payload in a canonical order so equivalent searches
+    share a cache entry ("in" lists are de-duplicated and sorted as well).
+    """
+    normalized = []
+    for search_filter in payload or []:
+        value = search_filter.get("value")
+        if isinstance(value, (list, tuple, set)):
+            value = sorted({str(item) for item in value})
+        normalized.append({
+            "field": search_filter.get("field"),
+            "type": search_filter.get("type"),
+            "value": value
+        })
+    normalized.sort(key=lambda search_filter: json.dumps(search_filter, sort_keys=True, default=str))
+    return normalized
+
+
+def make_cache_key(path, payload, params=None):
+    key_data = {
+        "path": path.strip("/"),
+        "filters": normalize_filters(payload),
+        "params": params or {}
+    }
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def parse_filter_date(value):
+    try:
+        return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def is_past_date(value, today=None):
+    """True if value is a date (or "YYYY-MM-DD..." string) before today."""
+    if value is None:
+        return False
+    value_date = parse_filter_date(value)
+    return value_date is not None and value_date < (today or date.today())
+
+
+def is_historical(payload, today=None):
+    """
+    A search only covers the past if every date field it filters on has an
+    upper bound before today. Open-ended searches ("gt"/"gte" only) can
+    still pick up new invoices, so they are never treated as immutable.
+    """
+    today = today or date.today()
+    upper_bounds = {}
+    seen_fields = set()
+
+    for search_filter in payload or []:
+        field = search_filter.get("field")
+        if field not in DATE_FIELDS:
+            continue
+        seen_fields.add(field)
+        if search_filter.get("type") in UPPER_BOUND_TYPES:
+            filter_date = parse_filter_date(search_filter.get("value"))
+            if filter_date is None:
+                return False
+            upper_bounds[field] = min(filter_date, upper_bounds.get(field, filter_date))
+
+    if not seen_fields or seen_fields != set(upper_bounds):
+        return False
+    return all(upper_bound < today for upper_bound in upper_bounds.values())
+
+
+class SageResponseCache:
+    """
+    SQLite cache of Sage search responses keyed by endpoint and filter payload.
+
+    Searches that only cover past dates never expire, nor do searches the
+    caller marks as historical (e.g. the items of invoices issued before
+    today). Everything else lives for a short TTL.
+    Least recently used entries are evicted once the cache exceeds max_bytes.
+    """
+
+    def __init__(self, path=None, today_ttl=300, default_ttl=600, max_bytes=200 * 1024 * 1024):
+        self.path = path or get_cache_path()
+        self.today_ttl = today_ttl
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            connection.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per call keeps this safe across worker threads
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def ttl_for(self, payload, historical=False):
+        if historical or is_historical(payload):
+            return None
+        for search_filter in payload or []:
+            if search_filter.get("field") in DATE_FIELDS:
+                return self.today_ttl
+        return self.default_ttl
+
+    def get(self, key):
+        now = time.time()
+        try:
+            with self._connect() as connection:
+                row = connection.execute(
+                    "SELECT body, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+
+                body, expires_at = row
+                if expires_at is not None and expires_at < now:
+                    connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    return None
+
+                connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            return json.loads(zlib.decompress(body).decode("utf-8"))
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            print(f"Error reading Sage cache: {e}")
+            return None
+
+    def set(self, key, path, payload, response, historical=False):
+        ttl = self.ttl_for(payload, historical)
+        now = time.time()
+        body = zlib.compress(json.dumps(response).encode("utf-8"))
+        expires_at = None if ttl is None else now + ttl
+
+        try:
+            with self._lock, self._connect() as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO responses (key, path, body, size, expires_at, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, path, body, len(body), expires_at, now)
+                )
+                self._evict(connection, now)
+        except sqlite3.Error as e:
+            print(f"Error writing Sage cache: {e}")
+
+    def _evict(self, connection, now):
+        connection.execute("DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+
+        total_size = connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total_size <= self.max_bytes:
+            return
+
+        for key, size in connection.execute("SELECT key, size FROM responses ORDER BY last_used ASC").fetchall():
+            connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total_size -= size
+            if total_size <= self.max_bytes:
+                break
+
+    def clear(self):
+        with self._lock, self._connect() as connection:
+            connection.execute("DELETE FROM responses")
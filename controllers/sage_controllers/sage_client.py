@@ -0,0 +1,365 @@
+import json
+import os
+import socket
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+from controllers.sage_controllers.response_cache import SageResponseCache, make_cache_key
+
+# Disable InsecureRequestWarning
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+# Load environment variables from .env
+load_dotenv()
+
+INTERNAL_HOST = 'server69.cw-direct.co.uk'
+INTERNAL_PORT = 50027
+
+# Retry on gateway / server errors, connection drops and read failures
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+
+def get_env_number(name, default, cast=float):
+    value = os.getenv(name) or os.environ.get(name)
+    try:
+        return cast(value) if value else default
+    except ValueError:
+        return default
+
+
+def is_internal_network():
+    """
+    Check if we're likely running on the internal network by testing if we can
+    resolve the internal hostname quickly.
+    """
+    try:
+        # Try to resolve the internal server hostname with a short timeout
+        socket.getaddrinfo(INTERNAL_HOST, INTERNAL_PORT)
+        return True
+    except (socket.gaierror, socket.timeout):
+        return False
+    finally:
+        # Reset socket timeout to default
+        socket.setdefaulttimeout(None)
+
+
+def chunked(values, chunk_size):
+    """Split values into lists of at most chunk_size items."""
+    values = list(values)
+    if not chunk_size or chunk_size <= 0:
+        return [values] if values else []
+    return [values[i:i + chunk_size] for i in range(0, len(values), chunk_size)]
+
+
+def fetch_in_chunks(fetch_chunk, values, chunk_size, max_workers, label="chunk",
+                    retries=0, backoff_factor=0, failed=None):
+    """
+    Run fetch_chunk(chunk) for every chunk of values on a bounded thread pool.
+    Yields (chunk_number, chunk_count, results) as each chunk finishes and
+    prints how long every chunk took.
+
+    A chunk that raises requests.RequestException is tried again up to
+    retries times, waiting backoff_factor * 2 ** attempt seconds between
+    tries. If it still fails the error is raised, unless a failed list is
+    passed: then (chunk, error) is appended to it and the chunk yields no
+    results, so one bad chunk doesn't lose the others.
+    """
+    chunks = chunked(values, chunk_size)
+    chunk_count = len(chunks)
+    if not chunk_count:
+        return
+
+    def timed_fetch(chunk):
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                results = fetch_chunk(chunk)
+                break
+            except requests.RequestException as e:
+                if attempt >= retries:
+                    raise
+                delay = backoff_factor * (2 ** attempt)
+                attempt += 1
+                print(f"Retrying {label} ({attempt}/{retries}) in {delay:.1f}s after error: {e}")
+                time.sleep(delay)
+        return results, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, chunk_count))) as executor:
+        futures = {executor.submit(timed_fetch, chunk): chunk for chunk in chunks}
+        try:
+            for chunk_number, future in enumerate(as_completed(futures), start=1):
+                try:
+                    results, elapsed = future.result()
+                except requests.RequestException as e:
+                    if failed is None:
+                        raise
+                    print(f"Giving up on {label} {chunk_number}/{chunk_count}: {e}")
+                    failed.append((futures[future], e))
+                    yield chunk_number, chunk_count, []
+                    continue
+
+                print(
+                    f"Fetched {label} {chunk_number}/{chunk_count}: "
+                    f"{len(futures[future])} requested, {len(results)} returned in {elapsed:.2f}s"
+                )
+                yield chunk_number, chunk_count, results
+        except BaseException:
+            # Don't start chunks nobody is going to read
+            for future in futures:
+                future.cancel()
+            raise
+
+
+class SageClient:
+    """
+    Shared HTTP client for the Sage API.
+
+    Holds one keep-alive requests.Session for every controller, probes the
+    internal/external route lazily on first use and caches it for route_ttl
+    seconds, and retries 5xx responses and connection errors with
+    exponential backoff.
+    """
+
+    def __init__(self, api_token=None, internal_url=None, external_url=None,
+                 connect_timeout=None, read_timeout=None, max_retries=None,
+                 backoff_factor=None, route_ttl=None, pool_size=None, page_size=None):
+        self.api_token = api_token or os.getenv("SAGE_API_TOKEN") or os.getenv("API_TOKEN")
+        self.internal_url = internal_url or os.getenv("SAGE_API_URL_INTERNAL") or os.environ.get("SAGE_API_URL_INTERNAL")
+        self.external_url = external_url or os.getenv("SAGE_API_URL") or os.environ.get("SAGE_API_URL")
+
+        self.connect_timeout = connect_timeout or get_env_number("SAGE_CONNECT_TIMEOUT", 30)
+        self.read_timeout = read_timeout or get_env_number("SAGE_READ_TIMEOUT", 90)
+        self.max_retries = max_retries if max_retries is not None else get_env_number("SAGE_MAX_RETRIES", 3, int)
+        self.backoff_factor = backoff_factor if backoff_factor is not None else get_env_number("SAGE_BACKOFF_FACTOR", 1.0)
+        self.route_ttl = route_ttl if route_ttl is not None else get_env_number("SAGE_ROUTE_TTL", 600)
+        self.pool_size = pool_size or get_env_number("SAGE_POOL_SIZE", 10, int)
+
+        # Search responses are cached on disk, SAGE_CACHE_ENABLED=0 turns this off
+        self.cache_enabled = (os.getenv("SAGE_CACHE_ENABLED") or "1") != "0"
+        self._cache = None
+        self._cache_lock = threading.Lock()
+
+        # Large "in" filters are split into chunks and fetched in parallel
+        self.chunk_size = get_env_number("SAGE_CHUNK_SIZE", 200, int)
+        self.max_workers = get_env_number("SAGE_MAX_WORKERS", 4, int)
+        # Whole chunks are retried on top of the per-request retries above
+        self.chunk_retries = get_env_number("SAGE_CHUNK_RETRIES", 2, int)
+
+        # Search endpoints can be paged through query parameters. Off (0) by
+        # default: the parameter names are unconfirmed, and paging relies on the
+        # server honouring SAGE_PAGE_SIZE exactly (a short page ends the search)
+        self.page_size = page_size if page_size is not None else get_env_number("SAGE_PAGE_SIZE", 0, int)
+        self.page_param = os.getenv("SAGE_PAGE_PARAM") or "page"
+        self.page_size_param = os.getenv("SAGE_PAGE_SIZE_PARAM") or "pageSize"
+
+        self._route = None
+        self._route_resolved_at = 0
+        self._route_lock = threading.Lock()
+
+        # The route is only probed on the first request, so constructing
+        # the client (and importing the controllers) does no network I/O
+        self.session = self._create_session()
+
+    def _create_session(self):
+        retry = Retry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            read=self.max_retries,
+            status=self.max_retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            # The Sage search endpoints are read-only, so POSTs are safe to retry
+            allowed_methods=frozenset(["GET", "POST", "HEAD"]),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            max_retries=retry
+        )
+
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({'Content-Type': 'application/json'})
+        return session
+
+    def resolve_route(self, force=False):
+        """
+        Return (base_url, verify) for the current network, probing at most
+        once per route_ttl seconds.
+        """
+        with self._route_lock:
+            expired = time.monotonic() - self._route_resolved_at > self.route_ttl
+            if self._route is None or expired or force:
+                if is_internal_network():
+                    print("Detected internal network, prioritizing direct internal connection")
+                    # The internal server uses a self-signed certificate
+                    self._route = (self.internal_url, False)
+                else:
+                    print("Detected external network, prioritizing external connection")
+                    self._route = (self.external_url, True)
+                self._route_resolved_at = time.monotonic()
+            return self._route
+
+    def invalidate_route(self):
+        """Force the next request to probe the network again."""
+        with self._route_lock:
+            self._route = None
+
+    @property
+    def base_url(self):
+        return self.resolve_route()[0]
+
+    def request(self, method, path, payload=None, timeout=None, params=None):
+        """
+        Send a request to the Sage API and return the response.
+        Raises requests.RequestException once the retries are used up.
+        """
+        base_url, verify = self.resolve_route()
+        if not base_url or not self.api_token:
+            raise ValueError("Missing SAGE_API_URL or SAGE_API_TOKEN in environment variables.")
+
+        data = json.dumps(payload) if payload is not None else ""
+
+        try:
+            response = self.session.request(
+                method,
+                f"{base_url}{path}",
+                headers={'AuthToken': self.api_token},
+                data=data,
+                params=params,
+                timeout=timeout or (self.connect_timeout, self.read_timeout),  # (connection timeout, read timeout)
+                verify=verify
+            )
+        except requests.ConnectionError:
+            # We may have moved between networks, probe again next time
+            self.invalidate_route()
+            raise
+
+        response.raise_for_status()  # Raise an error for non-2xx responses
+        return response
+
+    def get(self, path, timeout=None):
+        return self.request("GET", path, timeout=timeout).json()
+
+    def post(self, path, payload, timeout=None):
+        return self.request("POST", path, payload=payload, timeout=timeout).json()
+
+    @property
+    def cache(self):
+        """The on-disk response cache, opened on first use (None if disabled)."""
+        if not self.cache_enabled:
+            return None
+        if self._cache is None:
+            with self._cache_lock:
+                if self._cache is None:
+                    try:
+                        self._cache = SageResponseCache(
+                            today_ttl=get_env_number("SAGE_CACHE_TODAY_TTL", 300),
+                            default_ttl=get_env_number("SAGE_CACHE_TTL", 600),
+                            max_bytes=get_env_number("SAGE_CACHE_MAX_MB", 200) * 1024 * 1024
+                        )
+                    except Exception as e:
+                        print(f"Sage response cache unavailable: {e}")
+                        self.cache_enabled = False
+                        return None
+        return self._cache
+
+    def search(self, path, payload, timeout=None, params=None, historical=False):
+        """
+        POST a search and return the decoded response, served from the
+        response cache when an identical search is still fresh.
+        historical=True caches the response with no expiry, for searches the
+        caller knows can't change (the payload alone doesn't always show it).
+        """
+        cache = self.cache
+        if cache is None:
+            return self.request("POST", path, payload=payload, timeout=timeout, params=params).json()
+
+        key = make_cache_key(path, payload, params)
+        cached_response = cache.get(key)
+        if cached_response is not None:
+            return cached_response
+
+        response = self.request("POST", path, payload=payload, timeout=timeout, params=params).json()
+        cache.set(key, path, payload, response, historical)
+        return response
+
+    def paginate(self, path, payload, page_size=None, timeout=None, historical=False):
+        """
+        Yield the 'results' of a search endpoint one page at a time, so callers
+        can start processing before the whole result set has been downloaded
+        and only one page is held in memory.
+        """
+        page_size = self.page_size if page_size is None else page_size
+        if not page_size:
+            yield from self.search(path, payload, timeout=timeout, historical=historical).get('results') or []
+            return
+
+        page = 1
+        previous_first = None
+        while True:
+            params = {self.page_param: page, self.page_size_param: page_size}
+            results = self.search(path, payload, timeout=timeout, params=params, historical=historical).get('results') or []
+            if not results:
+                return
+
+            # A server that ignores the paging parameters sends the same page again
+            if previous_first is not None and results[0] == previous_first:
+                return
+            previous_first = results[0]
+
+            yield from results
+
+            # A short (or unpaged, oversized) page means there's nothing left, so a
+            # server capping pages below page_size would cut the results short
+            if len(results) != page_size:
+                return
+            page += 1
+
+    def test_connection(self):
+        url = self.base_url
+        print(f"\nFinal selected API URL: {url}")
+
+        # Optional: Try making a basic API request with the selected URL
+        # This helps verify the URL works beyond just being reachable
+        try:
+            test_endpoint = f"{url}/api/searchInvoice"  # Using an endpoint we know exists
+            print(f"\nTesting API endpoint: {test_endpoint}")
+
+            # Only send a HEAD request to avoid unnecessary data transfer
+            test_response = self.session.head(
+                test_endpoint,
+                headers={'AuthToken': self.api_token or "test-token"},
+                timeout=5,
+                verify=False
+            )
+
+            print(f"API endpoint test status: {test_response.status_code}")
+            if test_response.status_code < 400:
+                print("✓ API endpoint is accessible")
+            else:
+                print("✗ API endpoint returned an error status")
+        except requests.RequestException as e:
+            print(f"✗ API endpoint test failed: {str(e)}")
+
+
+_sage_client = None
+_sage_client_lock = threading.Lock()
+
+
+def get_sage_client():
+    """Return the process-wide SageClient, creating it on first use."""
+    global _sage_client
+    if _sage_client is None:
+        with _sage_client_lock:
+            if _sage_client is None:
+                _sage_client = SageClient()
+    return _sage_client
@@ -1,80 +1,43 @@
 import json
-import os
 import psycopg2
 from psycopg2 import sql
-from dotenv import load_dotenv
-
+from database.connection import get_connection
 from models.butchers_list import ButchersList
 
-# Load environment variables from .env file
-load_dotenv()
-
-DB_HOST = os.getenv('DB_HOST')
-DB_PORT = os.getenv('DB_PORT')
-DB_NAME = os.getenv('DB_NAME')
-DB_USER = os.getenv('DB_USER')
-DB_PASSWORD = os.getenv('DB_PASSWORD')
-
-if not DB_HOST or not DB_PORT or not DB_NAME or not DB_USER or not DB_PASSWORD:
-    DB_HOST = os.environ.get("DB_HOST")
-    DB_PORT = os.environ.get("DB_PORT")
-    DB_NAME = os.environ.get("DB_NAME")
-    DB_USER = os.environ.get("DB_USER")
-    DB_PASSWORD = os.environ.get("DB_PASSWORD")
-
-def connect_db():
-  try:
-      # Establish the connection
-      connection = psycopg2.connect(
-          host=DB_HOST,
-          port=DB_PORT,
-          dbname=DB_NAME,
-          user=DB_USER,
-          password=DB_PASSWORD
-      )
-      # print("Connection to database successful")
-      return connection
-  except Exception as e:
-      print(f"Failed to connect to database: {e}")
-      return None
 
 def fetch_butchers_list_by_date(date):
-  connection = connect_db()
-  if connection:
-    cursor = connection.cursor()
-    cursor.execute(
-      "SELECT * FROM butchers_lists WHERE date = %s ORDER BY updated_at DESC LIMIT 1",
-      (date,)
-    )
-    # print(cursor.fetchone())
-    result = convert_to_butchers_list_objects(cursor.fetchone())
-    cursor.close()
-    connection.close()
-    return result
+  with get_connection() as connection:
+    if connection:
+      cursor = connection.cursor()
+      cursor.execute(
+        "SELECT * FROM butchers_lists WHERE date = %s ORDER BY updated_at DESC LIMIT 1",
+        (date,)
+      )
+      # print(cursor.fetchone())
+      result = convert_to_butchers_list_objects(cursor.fetchone())
+      cursor.close()
+      return result
   
 def fetch_all_butchers_lists_by_date(date):
-  connection = connect_db()
-  if connection:
-    cursor = connection.cursor()
-    cursor.execute(
-      "SELECT * FROM butchers_lists WHERE date = %s ORDER BY updated_at ASC",
-      (date,)
-    )
-    fetched_data = cursor.fetchall()
-    # print(fetched_data)
-    results = [ButchersList(*row) for row in fetched_data]
-    # results.sort(key=lambda x: x.updated_at, reverse=False)
-    cursor.close()
-    connection.close()
-    return results
+  with get_connection() as connection:
+    if connection:
+      cursor = connection.cursor()
+      cursor.execute(
+        "SELECT * FROM butchers_lists WHERE date = %s ORDER BY updated_at ASC",
+        (date,)
+      )
+      fetched_data = cursor.fetchall()
+      # print(fetched_data)
+      results = [ButchersList(*row) for row in fetched_data]
+      # results.sort(key=lambda x: x.updated_at, reverse=False)
+      cursor.close()
+      return results
 
 def insert_butchers_list(date, data, updated_at):
-    connection = None
     try:
-        # Attempt to connect to the database
-        connection = connect_db()
-        
-        if connection:
+        # Borrow a connection from the shared pool
+        with get_connection() as connection:
+          if connection:
             cursor = connection.cursor()
             
             try:
@@ -98,48 +61,42 @@ def insert_butchers_list(date, data, updated_at):
             finally:
                 # Close cursor regardless of success or failure
                 cursor.close()
-        else:
+          else:
             print("Failed to connect to database")
             return False
             
     except Exception as e:
         print(f"Database connection error: {e}")
         return False
-        
-    finally:
-        # Ensure connection is closed even if an exception occurs
-        if connection:
-            connection.close()
 
 def update_butchers_list(butchers_list_id, refreshed_at, data=None):
     """Update the details of an existing product in the database."""
     
-    # Create a connection to the database
-    connection = connect_db()
-    # print(f"butchers_list_id: {butchers_list_id}")
-    # print(f"refreshed_at: {refreshed_at}")
-    if connection:
-        cursor = connection.cursor()
+    # Borrow a connection from the shared pool
+    with get_connection() as connection:
+        # print(f"butchers_list_id: {butchers_list_id}")
+        # print(f"refreshed_at: {refreshed_at}")
+        if connection:
+            cursor = connection.cursor()
         
-        # Prepare the SQL statement
-        update_query = sql.SQL("""
-            UPDATE butchers_lists
-            SET 
-                data = COALESCE(%s, data),
-                refreshed_at = COALESCE(%s, refreshed_at)
-            WHERE id = %s
-        """)
+            # Prepare the SQL statement
+            update_query = sql.SQL("""
+                UPDATE butchers_lists
+                SET 
+                    data = COALESCE(%s, data),
+                    refreshed_at = COALESCE(%s, refreshed_at)
+                WHERE id = %s
+            """)
         
-        # Execute the query with parameters
-        cursor.execute(update_query, (json.dumps(data), refreshed_at, butchers_list_id))
+            # Execute the query with parameters
+            cursor.execute(update_query, (json.dumps(data), refreshed_at, butchers_list_id))
         
-        connection.commit()  # Commit the changes
-        # print(f"Product with ID {product_id} updated successfully!")
+            connection.commit()  # Commit the changes
+            # print(f"Product with ID {product_id} updated successfully!")
         
-        cursor.close()
-        connection.close()
-    else:
-        print("Failed to connect to the database, product not updated.")
+            cursor.close()
+        else:
+            print("Failed to connect to the database, product not updated.")
 
 
 
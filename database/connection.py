@@ -0,0 +1,182 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import pool
+from psycopg2 import extensions
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+DB_HOST = os.getenv('DB_HOST')
+DB_PORT = os.getenv('DB_PORT')
+DB_NAME = os.getenv('DB_NAME')
+DB_USER = os.getenv('DB_USER')
+DB_PASSWORD = os.getenv('DB_PASSWORD')
+
+if not DB_HOST or not DB_PORT or not DB_NAME or not DB_USER or not DB_PASSWORD:
+    DB_HOST = os.environ.get("DB_HOST")
+    DB_PORT = os.environ.get("DB_PORT")
+    DB_NAME = os.environ.get("DB_NAME")
+    DB_USER = os.environ.get("DB_USER")
+    DB_PASSWORD = os.environ.get("DB_PASSWORD")
+
+# Pool sizing and health checks can be tuned from the .env file
+DB_POOL_MIN = int(os.getenv('DB_POOL_MIN') or 1)
+# Every TaskScheduler worker may hold a connection at once (same setting and
+# default as gui/components/reusable/task_scheduler.py, read here so the
+# database layer doesn't import Qt). The headroom covers the GUI thread's own
+# queries, so a full pool of workers can't starve it.
+TASK_SCHEDULER_MAX_WORKERS = int(os.getenv('TASK_SCHEDULER_MAX_WORKERS') or 4)
+DB_POOL_HEADROOM = 4
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX') or TASK_SCHEDULER_MAX_WORKERS + DB_POOL_HEADROOM)
+if DB_POOL_MAX <= TASK_SCHEDULER_MAX_WORKERS:
+    print(
+        f"Warning: DB_POOL_MAX ({DB_POOL_MAX}) should be larger than "
+        f"TASK_SCHEDULER_MAX_WORKERS ({TASK_SCHEDULER_MAX_WORKERS}), "
+        "otherwise background tasks can use up every connection"
+    )
+# How long (seconds) to wait for a connection when every one is in use
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT') or 10)
+# Connections idle for longer than this (seconds) are pinged before being handed out
+DB_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL') or 60)
+
+_pool = None
+_pool_lock = threading.Lock()
+_last_used = {}
+
+
+def get_pool():
+    """
+    Return the process-wide connection pool, creating it on first use.
+    The pool is shared by the GUI thread and every TaskScheduler worker.
+    """
+    global _pool
+    if _pool is not None:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None:
+            try:
+                _pool = pool.ThreadedConnectionPool(
+                    DB_POOL_MIN,
+                    DB_POOL_MAX,
+                    host=DB_HOST,
+                    port=DB_PORT,
+                    dbname=DB_NAME,
+                    user=DB_USER,
+                    password=DB_PASSWORD
+                )
+            except Exception as e:
+                print(f"Failed to connect to database: {e}")
+                return None
+    return _pool
+
+
+def close_pool():
+    """Close every pooled connection, e.g. when the application exits."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+            _last_used.clear()
+
+
+def is_healthy(connection):
+    """Check a pooled connection is still usable before handing it out."""
+    if connection.closed:
+        return False
+
+    last_used = _last_used.get(id(connection))
+    # Freshly opened connections don't need a round trip to prove they work
+    if last_used is None or time.monotonic() - last_used < DB_POOL_HEALTH_CHECK_INTERVAL:
+        return True
+
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT 1")
+        cursor.close()
+        connection.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def wait_for_connection(connection_pool):
+    """
+    Take a connection from the pool, waiting up to DB_POOL_TIMEOUT seconds
+    for one to be returned when they're all in use.
+    """
+    deadline = time.monotonic() + DB_POOL_TIMEOUT
+    while True:
+        try:
+            return connection_pool.getconn()
+        except pool.PoolError:
+            # A closed pool won't get any connections back
+            if connection_pool.closed or time.monotonic() >= deadline:
+                raise
+            time.sleep(0.05)
+
+
+def acquire_connection(connection_pool):
+    """Take a healthy connection from the pool, discarding any stale ones."""
+    # Try at most max size + 1 times so a pool full of dead connections gets recycled
+    for _ in range(connection_pool.maxconn + 1):
+        connection = wait_for_connection(connection_pool)
+        if is_healthy(connection):
+            return connection
+        _last_used.pop(id(connection), None)
+        connection_pool.putconn(connection, close=True)
+    raise psycopg2.OperationalError("No healthy database connection available")
+
+
+@contextmanager
+def get_connection():
+    """
+    Borrow a connection from the shared pool.
+
+    Waits up to DB_POOL_TIMEOUT seconds when every connection is in use.
+    Yields None if the database can't be reached or no connection frees up,
+    so callers keep their existing `if connection:` checks. Any open transaction is rolled back
+    when the block exits, and the connection goes back to the pool instead
+    of being closed.
+    """
+    connection_pool = get_pool()
+    connection = None
+
+    if connection_pool:
+        try:
+            connection = acquire_connection(connection_pool)
+        except pool.PoolError as e:
+            print(
+                f"No database connection free: all {connection_pool.maxconn} pooled connections "
+                f"were still in use after {DB_POOL_TIMEOUT}s ({e}). "
+                "Raise DB_POOL_MAX or lower TASK_SCHEDULER_MAX_WORKERS."
+            )
+            connection = None
+        except Exception as e:
+            print(f"Failed to connect to database: {e}")
+            connection = None
+
+    try:
+        yield connection
+    finally:
+        if connection:
+            close = bool(connection.closed)
+            if not close:
+                try:
+                    # Reset anything left uncommitted (including read-only transactions)
+                    if connection.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                        connection.rollback()
+                except psycopg2.Error:
+                    close = True
+
+            if close:
+                _last_used.pop(id(connection), None)
+            else:
+                _last_used[id(connection)] = time.monotonic()
+            connection_pool.putconn(connection, close=close)
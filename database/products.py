@@ -1,45 +1,31 @@
-import os
 import psycopg2
 from psycopg2 import sql
+from psycopg2.extras import execute_values
+from database.connection import get_connection
 from models.product import Product
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-DB_HOST = os.getenv('DB_HOST')
-DB_PORT = os.getenv('DB_PORT')
-DB_NAME = os.getenv('DB_NAME')
-DB_USER = os.getenv('DB_USER')
-DB_PASSWORD = os.getenv('DB_PASSWORD')
-
-if not DB_HOST or not DB_PORT or not DB_NAME or not DB_USER or not DB_PASSWORD:
-    DB_HOST = os.environ.get("DB_HOST")
-    DB_PORT = os.environ.get("DB_PORT")
-    DB_NAME = os.environ.get("DB_NAME")
-    DB_USER = os.environ.get("DB_USER")
-    DB_PASSWORD = os.environ.get("DB_PASSWORD")
-
-def connect_db():
-  try:
-      # Establish the connection
-      connection = psycopg2.connect(
-          host=DB_HOST,
-          port=DB_PORT,
-          dbname=DB_NAME,
-          user=DB_USER,
-          password=DB_PASSWORD
-      )
-      # print("Connection to database successful")
-      return connection
-  except Exception as e:
-      print(f"Failed to connect to database: {e}")
-      return None
+
+
+# Callbacks run after the products table changes, e.g. to drop the cached
+# catalogue in utils/product_catalog.py
+_products_changed_listeners = []
+
+
+def add_products_changed_listener(listener):
+  if listener not in _products_changed_listeners:
+    _products_changed_listeners.append(listener)
+
+
+def notify_products_changed():
+  for listener in list(_products_changed_listeners):
+    try:
+      listener()
+    except Exception as e:
+      print(f"Error notifying product change listener: {e}")
 
 
 def create_product_table():
-  connection = connect_db()
-  if connection:
+  with get_connection() as connection:
+    if connection:
       cursor = connection.cursor()
       cursor.execute("""
           CREATE TABLE IF NOT EXISTS products (
@@ -58,15 +44,12 @@ def create_product_table():
       connection.commit()
       print("Table 'products' created successfully.")
       cursor.close()
-      connection.close()
 
 def insert_product(name, cost, stock_count, product_value, stock_category, product_category, sage_code, supplier, sold_as):
-    connection = None
     try:
-        # Attempt to connect to the database
-        connection = connect_db()
-        
-        if connection:
+        # Borrow a connection from the shared pool
+        with get_connection() as connection:
+          if connection:
             cursor = connection.cursor()
             
             try:
@@ -79,6 +62,7 @@ def insert_product(name, cost, stock_count, product_value, stock_category, produ
                 # Commit the transaction
                 connection.commit()
                 print(f"Product {name} added successfully!")
+                notify_products_changed()
                 return True
                 
             except Exception as e:
@@ -90,71 +74,78 @@ def insert_product(name, cost, stock_count, product_value, stock_category, produ
             finally:
                 # Close cursor regardless of success or failure
                 cursor.close()
-        else:
+          else:
             print("Failed to connect to database")
             return False
             
     except Exception as e:
         print(f"Database connection error: {e}")
         return False
-        
-    finally:
-        # Ensure connection is closed even if an exception occurs
-        if connection:
-            connection.close()
 
 def fetch_products():
-  connection = connect_db()
   rows = []
-  if connection:
+  with get_connection() as connection:
+    if connection:
       cursor = connection.cursor()
       cursor.execute("SELECT * FROM products ORDER BY name ASC")
       rows = convert_to_product_objects(cursor.fetchall())
       cursor.close()
-      connection.close()
       return rows
     
 def fetch_products_stock_take(category):
-  connection = connect_db()
   results = {}
-  if connection:
-    cursor = connection.cursor()
-    cursor.execute(f"SELECT * FROM products WHERE stock_category = '{category}' ")
-    results[category] = convert_to_product_objects(cursor.fetchall())
+  with get_connection() as connection:
+    if connection:
+      cursor = connection.cursor()
+      cursor.execute("SELECT * FROM products WHERE stock_category = %s", (category,))
+      results[category] = convert_to_product_objects(cursor.fetchall())
 
-    cursor.close()
-    connection.close()
-    return results
+      cursor.close()
+      return results
   
 def fetch_products_stock_code_fresh():
-  connection = connect_db()
   results = {}
-  if connection:
-    cursor = connection.cursor()
-    cursor.execute("SELECT sage_code FROM products WHERE stock_category = 'fresh'")
-    results = {row[0] for row in cursor.fetchall()} 
+  with get_connection() as connection:
+    if connection:
+      cursor = connection.cursor()
+      cursor.execute("SELECT sage_code FROM products WHERE stock_category = 'fresh'")
+      results = {row[0] for row in cursor.fetchall()} 
 
-    cursor.close()
-    connection.close()
-    return results
+      cursor.close()
+      return results
   
 def fetch_single_product_stock_code(sage_code):
-    connection = connect_db()
-    if connection:
-        cursor = connection.cursor()
-        cursor.execute("SELECT * FROM products WHERE sage_code LIKE %s", (sage_code,))
-        row = cursor.fetchone()
-        cursor.close()
-        connection.close()
-        if row:
-            return Product(*row)
-        return None
+    with get_connection() as connection:
+        if connection:
+            cursor = connection.cursor()
+            cursor.execute("SELECT * FROM products WHERE sage_code LIKE %s", (sage_code,))
+            row = cursor.fetchone()
+            cursor.close()
+            if row:
+                return Product(*row)
+            return None
+
+
+def fetch_all_product_sage_codes():
+  """
+  Fetch the sage_code cell of every product in one query.
+  Returns None if the database can't be reached.
+  """
+  with get_connection() as connection:
+    if not connection:
+      return None
+    cursor = connection.cursor()
+    cursor.execute("SELECT sage_code FROM products WHERE sage_code IS NOT NULL AND sage_code <> ''")
+    results = [row[0] for row in cursor.fetchall()]
+
+    cursor.close()
+  return results
 
   
 def fetch_products_by_ids(product_ids):
-  connection = connect_db()
   results = {}
-  if connection:
+  with get_connection() as connection:
+    if connection:
       cursor = connection.cursor()
       
       # Create placeholders for the IN clause
@@ -165,7 +156,6 @@ def fetch_products_by_ids(product_ids):
       results = convert_to_product_objects(cursor.fetchall())
 
       cursor.close()
-      connection.close()
       return results
       
 def convert_to_product_objects(products):
@@ -176,40 +166,83 @@ def update_product(product_id, name=None, cost=None, stock_count=None,
                    sage_code=None, supplier=None, sold_as=None):
     """Update the details of an existing product in the database."""
     
-    # Create a connection to the database
-    connection = connect_db()
+    # Borrow a connection from the shared pool
+    with get_connection() as connection:
     
-    if connection:
-        cursor = connection.cursor()
+        if connection:
+            cursor = connection.cursor()
         
-        # Prepare the SQL statement
-        update_query = sql.SQL("""
-            UPDATE products
-            SET 
-                name = COALESCE(%s, name),
-                cost = COALESCE(%s, cost),
-                stock_count = COALESCE(%s, stock_count),
-                product_value = COALESCE(%s, product_value),
-                stock_category = COALESCE(%s, stock_category),
-                product_category = COALESCE(%s, product_category),
-                sage_code = COALESCE(%s, sage_code),
-                supplier = COALESCE(%s, supplier),
-                sold_as = COALESCE(%s, sold_as)
-            WHERE id = %s
-        """)
+            # Prepare the SQL statement
+            update_query = sql.SQL("""
+                UPDATE products
+                SET 
+                    name = COALESCE(%s, name),
+                    cost = COALESCE(%s, cost),
+                    stock_count = COALESCE(%s, stock_count),
+                    product_value = COALESCE(%s, product_value),
+                    stock_category = COALESCE(%s, stock_category),
+                    product_category = COALESCE(%s, product_category),
+                    sage_code = COALESCE(%s, sage_code),
+                    supplier = COALESCE(%s, supplier),
+                    sold_as = COALESCE(%s, sold_as)
+                WHERE id = %s
+            """)
         
-        # Execute the query with parameters
-        cursor.execute(update_query, (name, cost, stock_count, product_value, 
-                                      stock_category, product_category, sage_code, 
-                                      supplier, sold_as, product_id))
+            # Execute the query with parameters
+            cursor.execute(update_query, (name, cost, stock_count, product_value, 
+                                          stock_category, product_category, sage_code, 
+                                          supplier, sold_as, product_id))
         
-        connection.commit()  # Commit the changes
-        # print(f"Product with ID {product_id} updated successfully!")
+            connection.commit()  # Commit the changes
+            # print(f"Product with ID {product_id} updated successfully!")
+            notify_products_changed()
         
-        cursor.close()
-        connection.close()
-    else:
-        print("Failed to connect to the database, product not updated.")
+            cursor.close()
+        else:
+            print("Failed to connect to the database, product not updated.")
+
+def write_stock_counts(cursor, stock_counts):
+    """
+    Set stock_count for many products with a single UPDATE ... FROM (VALUES ...).
+    Runs on the caller's cursor so it can share a transaction; nothing is committed here.
+    """
+    if not stock_counts:
+        return 0
+
+    execute_values(
+        cursor,
+        """
+            UPDATE products AS p
+            SET stock_count = v.stock_count
+            FROM (VALUES %s) AS v (id, stock_count)
+            WHERE p.id = v.id
+        """,
+        [(int(product_id), stock_count) for product_id, stock_count in stock_counts.items()],
+        template="(%s::integer, %s::real)",
+        page_size=1000
+    )
+    return cursor.rowcount
+
+
+def update_stock_counts(stock_counts):
+    """Update the stock count of every product in {product_id: stock_count} in one transaction."""
+    with get_connection() as connection:
+        if connection:
+            cursor = connection.cursor()
+            try:
+                write_stock_counts(cursor, stock_counts)
+                connection.commit()
+                notify_products_changed()
+                return True
+            except psycopg2.Error as e:
+                connection.rollback()
+                print(f"Error updating stock counts: {e}")
+                return False
+            finally:
+                cursor.close()
+        else:
+            print("Failed to connect to the database, stock counts not updated.")
+            return False
 
 if __name__ == "__main__":
   create_product_table()
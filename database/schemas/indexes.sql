@@ -0,0 +1,9 @@
+-- Indexes backing the application's hot queries.
+-- Apply once against the Supabase database (SQL editor or psql); every
+-- statement is idempotent so the file can be re-run after changes.
+
+-- fetch_deliveries_by_week: date BETWEEN monday AND sunday ORDER BY date
+CREATE INDEX IF NOT EXISTS deliveries_date_idx ON deliveries (date);
+
+-- fetch_most_recent_stock_take: DISTINCT ON (product_category) ... ORDER BY product_category, date DESC
+CREATE INDEX IF NOT EXISTS stock_takes_category_date_idx ON stock_takes (product_category, date DESC);
@@ -0,0 +1,17 @@
+-- Sends NOTIFY products_changed whenever the products table changes, so
+-- every running copy of the app drops its cached product catalogue
+-- (utils/product_catalog.py, enabled with PRODUCT_CATALOG_LISTEN=1).
+-- LISTEN needs a session connection: use the direct / session-mode port,
+-- not the transaction pooler.
+
+CREATE OR REPLACE FUNCTION notify_products_changed() RETURNS trigger AS $$
+BEGIN
+  PERFORM pg_notify('products_changed', TG_OP);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS products_changed_notify ON products;
+CREATE TRIGGER products_changed_notify
+AFTER INSERT OR UPDATE OR DELETE ON products
+FOR EACH STATEMENT EXECUTE FUNCTION notify_products_changed();
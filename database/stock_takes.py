@@ -1,74 +1,74 @@
-import os
 import psycopg2
 from psycopg2 import sql
 from models.stock_take import StockTake
-from dotenv import load_dotenv
+from database.connection import get_connection
+from database.products import write_stock_counts, notify_products_changed
 
-# Load environment variables from .env file
-load_dotenv()
-
-DB_HOST = os.getenv('DB_HOST')
-DB_PORT = os.getenv('DB_PORT')
-DB_NAME = os.getenv('DB_NAME')
-DB_USER = os.getenv('DB_USER')
-DB_PASSWORD = os.getenv('DB_PASSWORD')
-
-if not DB_HOST or not DB_PORT or not DB_NAME or not DB_USER or not DB_PASSWORD:
-    DB_HOST = os.environ.get("DB_HOST")
-    DB_PORT = os.environ.get("DB_PORT")
-    DB_NAME = os.environ.get("DB_NAME")
-    DB_USER = os.environ.get("DB_USER")
-    DB_PASSWORD = os.environ.get("DB_PASSWORD")
-
-def connect_db():
-  try:
-      # Establish the connection
-      connection = psycopg2.connect(
-          host=DB_HOST,
-          port=DB_PORT,
-          dbname=DB_NAME,
-          user=DB_USER,
-          password=DB_PASSWORD
-      )
-      # print("Connection to database successful")
-      return connection
-  except Exception as e:
-      print(f"Failed to connect to database: {e}")
-      return None
 
 
 def create_stock_take_table():
-  connection = connect_db()
-  if connection:
-      cursor = connection.cursor()
-      cursor.execute("""
-          CREATE TABLE IF NOT EXISTS stock_takes (
-            id SERIAL PRIMARY KEY,
-            date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-            take JSONB NOT NULL,
-            product_category TEXT NOT NULL
-          );
-      """)
-      connection.commit()
-      print("Table 'stock_take' created successfully.")
-      cursor.close()
-      connection.close()
+  with get_connection() as connection:
+    if connection:
+        cursor = connection.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS stock_takes (
+              id SERIAL PRIMARY KEY,
+              date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+              take JSONB NOT NULL,
+              product_category TEXT NOT NULL
+            );
+        """)
+        connection.commit()
+        print("Table 'stock_take' created successfully.")
+        cursor.close()
 
 def insert_stock_take(take, product_categories, date):
-  connection = connect_db()
+  with get_connection() as connection:
+    category = ""
+    for product_category in product_categories:
+       category += product_category
+    if connection:
+        cursor = connection.cursor()
+        cursor.execute("""
+            INSERT INTO stock_takes (date, take, product_category) 
+            VALUES (%s, %s, %s)
+        """, (date, take, category))
+        connection.commit()
+        print(f"Stock take {category} added successfully!")
+        cursor.close()
+
+def save_stock_take(take, product_categories, date, stock_counts=None):
+  """
+  Insert a stock take and, if given, write {product_id: stock_count} back to
+  products in the same transaction, so either everything is saved or nothing is.
+  """
   category = ""
   for product_category in product_categories:
      category += product_category
-  if connection:
-      cursor = connection.cursor()
+
+  with get_connection() as connection:
+    if not connection:
+      print("Failed to connect to the database, stock take not saved.")
+      return False
+
+    cursor = connection.cursor()
+    try:
+      write_stock_counts(cursor, stock_counts)
       cursor.execute("""
           INSERT INTO stock_takes (date, take, product_category) 
           VALUES (%s, %s, %s)
       """, (date, take, category))
       connection.commit()
       print(f"Stock take {category} added successfully!")
+      if stock_counts:
+        notify_products_changed()
+      return True
+    except psycopg2.Error as e:
+      connection.rollback()
+      print(f"Error saving stock take {category}: {e}")
+      return False
+    finally:
       cursor.close()
-      connection.close()
 
 # def fetch_products():
 #   connection = connect_db()
@@ -82,61 +82,67 @@ def insert_stock_take(take, product_categories, date):
 #       return rows
     
 def fetch_most_recent_stock_take(categories):
-  connection = connect_db()
-  results = {}
-  if connection:
-    cursor = connection.cursor()
-    for category in categories:
-      # cursor.execute(f"SELECT * FROM products WHERE stock_category = '{category}' ")
-      cursor.execute(
-        "SELECT * FROM stock_takes WHERE product_category = %s ORDER BY date_added DESC LIMIT 1",
-        (category,)
-      )
-      # print(cursor.fetchone())
-      results[category] = StockTake(*cursor.fetchone())
-    cursor.close()
-    connection.close()
-    return results
-  
-def fetch_stock_takes_in_date_range_with_category(category, start_date, end_date):
-    connection = connect_db()
+  """
+  Latest stock take for each category in one round trip.
+  Categories with no stock take yet are left out of the result.
+  Backed by stock_takes_category_date_idx (database/schemas/indexes.sql).
+  """
+  with get_connection() as connection:
     results = {}
     if connection:
       cursor = connection.cursor()
       cursor.execute(
-          "SELECT * FROM stock_takes WHERE product_category = %s AND date BETWEEN %s AND %s",
-          (category, start_date, end_date)
+        """
+        SELECT DISTINCT ON (product_category) *
+        FROM stock_takes
+        WHERE product_category = ANY(%s)
+        ORDER BY product_category, date DESC, created_at DESC
+        """,
+        (list(categories),)
       )
-      fetched_data = cursor.fetchall()  # Fetch all matching rows
-      if fetched_data:
-        results = [StockTake(*row) for row in fetched_data]
-      else:
-        results = []  # Store empty list if no stock takes found
-
+      for row in cursor.fetchall():
+        stock_take = StockTake(*row)
+        results[stock_take.product_category] = stock_take
       cursor.close()
-      connection.close()
-    return results  
+      return results
+  
+def fetch_stock_takes_in_date_range_with_category(category, start_date, end_date):
+    with get_connection() as connection:
+        results = {}
+        if connection:
+          cursor = connection.cursor()
+          cursor.execute(
+              "SELECT * FROM stock_takes WHERE product_category = %s AND date BETWEEN %s AND %s",
+              (category, start_date, end_date)
+          )
+          fetched_data = cursor.fetchall()  # Fetch all matching rows
+          if fetched_data:
+            results = [StockTake(*row) for row in fetched_data]
+          else:
+            results = []  # Store empty list if no stock takes found
+
+          cursor.close()
+        return results  
   
 def fetch_stock_takes_in_date_range(start_date, end_date):
-    connection = connect_db()
-    results = {}
-    if connection:
-      cursor = connection.cursor()
-      cursor.execute(
-          "SELECT * FROM stock_takes WHERE date BETWEEN %s AND %s AND product_category != 'all'",
-          (start_date, end_date)
-      )
-      fetched_data = cursor.fetchall()  # Fetch all matching rows
+    with get_connection() as connection:
+        results = {}
+        if connection:
+          cursor = connection.cursor()
+          cursor.execute(
+              "SELECT * FROM stock_takes WHERE date BETWEEN %s AND %s AND product_category != 'all'",
+              (start_date, end_date)
+          )
+          fetched_data = cursor.fetchall()  # Fetch all matching rows
 
-      if fetched_data:
-        results = [StockTake(*row) for row in fetched_data]
-      else:
-        results = []  # Store empty list if no stock takes found
+          if fetched_data:
+            results = [StockTake(*row) for row in fetched_data]
+          else:
+            results = []  # Store empty list if no stock takes found
 
-      cursor.close()
-      connection.close()
+          cursor.close()
 
-    return results  
+        return results  
 
   
 def convert_to_stock_take_objects(stock_takes):
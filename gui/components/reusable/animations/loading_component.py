@@ -1,109 +1,164 @@
 # File: loading_components.py
 from datetime import datetime
-import threading
-from PyQt5.QtWidgets import QProgressDialog
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer
-
-class GenericWorkerThread(QThread):
-    finished = pyqtSignal(object)
-    error = pyqtSignal(str)
-    progress = pyqtSignal(int, int)
-    pause_requested = pyqtSignal(object)  # Generic signal for "pause and ask user"
-
-    def __init__(self, task_function, *args, **kwargs):
-        super().__init__()
-        self.task_function = task_function
-        self.args = args
-        self.kwargs = kwargs
-        self._pause_callback = None
-        self.fetched_at = datetime.now().strftime('%Y-%m-%d, %H:%M:%S')
-
-
-    def run(self):
+from PyQt5.QtWidgets import QProgressDialog, QPushButton
+from PyQt5.QtCore import Qt, QTimer
+from gui.components.reusable.task_scheduler import get_task_scheduler, PRIORITY_NORMAL
+
+
+class TaskProgressDialog(QProgressDialog):
+    """
+    Progress dialog for one scheduled task. It isn't modal, so other
+    windows stay usable while the task runs.
+    """
+
+    def __init__(self, handle, loading_text, title, parent=None):
+        super().__init__(loading_text, "Cancel", 0, 0, parent)
+        self.handle = handle
+        self.loading_text = loading_text
+        self.title = title
+        self.cancelling = False
+        self.elapsed_seconds = 0
+
+        self.setWindowTitle(title)
+        self.setWindowModality(Qt.NonModal)
+        if handle.cancellable:
+            self.cancel_button = QPushButton("Cancel")
+            self.setCancelButton(self.cancel_button)
+            self.canceled.connect(self.request_cancel)
+        else:
+            self.cancel_button = None
+            self.setCancelButton(None)
+        self.setRange(0, 0)
+        # Reaching the maximum mustn't close the dialog while the task is still finishing
+        self.setAutoReset(False)
+        self.setAutoClose(False)
+
+        # Switch from the busy indicator to a real bar once the task reports progress
+        handle.progress.connect(self.update_progress)
+        handle.stage_changed.connect(self.update_stage)
+
+        # --- Setup timer for elapsed seconds ---
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.update_timer_title)
+        self.timer.start(1000)
+
+    def update_timer_title(self):
+        self.elapsed_seconds += 1
+        self.setWindowTitle(f"{self.title} ({self.elapsed_seconds}s)")
+
+    def update_progress(self, done, total):
+        if self.cancelling:
+            return
+        if total > 0:
+            self.setRange(0, total)
+            self.setValue(done)
+        else:
+            self.setRange(0, 0)
+
+    def update_stage(self, stage):
+        if not self.cancelling:
+            self.setLabelText(f"{self.loading_text}\n{stage}" if stage else self.loading_text)
+
+    def request_cancel(self):
+        """Ask the task to stop, it finishes at its next cancellation point."""
+        if self.cancelling or self.handle.is_done():
+            return
+        self.cancelling = True
+        self.handle.cancel()
+        # QProgressDialog hides itself on cancel, keep it up until the task has stopped
+        self.setLabelText("Cancelling...")
+        self.setRange(0, 0)
+        if self.cancel_button:
+            self.cancel_button.setEnabled(False)
+        self.show()
+
+    def finish(self):
+        self.timer.stop()
+        # Closing the dialog emits canceled, which mustn't cancel a finished task
         try:
-            # Pass a callback to the task so it can trigger a pause event
-            result = self.task_function(*self.args, on_pause=self._handle_pause, **self.kwargs)
-            self.finished.emit(result)
-        except Exception as e:
-            self.error.emit(str(e))
+            self.canceled.disconnect(self.request_cancel)
+        except TypeError:
+            pass
+        self.close()
+        self.deleteLater()
 
-    def _handle_pause(self, data):
-        """Called from within the worker when a user action is required."""
-        self.pause_requested.emit(data)
 
 class LoadingManager:
-    def __init__(self, parent_widget):
+    """
+    Runs tasks on the shared TaskScheduler with a progress dialog each.
+    A window can start several tasks, and tasks from different windows
+    run side by side.
+    """
+
+    def __init__(self, parent_widget, scheduler=None):
         self.parent = parent_widget
-        self.progress_dialog = None
-        self.worker_thread = None
-        self.timer = None
-        self.elapsed_seconds = 0
+        self.scheduler = scheduler or get_task_scheduler()
+        self.dialogs = {}
 
     def run_with_loading(self, task_function, on_complete=None, on_error=None, on_pause=None,
                          loading_text="Loading...", title="Please Wait",
-                         task_args=(), task_kwargs={}):
-        # --- Show progress dialog ---
-        self.progress_dialog = QProgressDialog(loading_text, "Cancel", 0, 0, self.parent)
-        self.progress_dialog.setWindowTitle(title)
-        self.progress_dialog.setWindowModality(Qt.WindowModal)
-        self.progress_dialog.setCancelButton(None)
-        self.progress_dialog.setRange(0, 0)
-        self.progress_dialog.show()
-
-        # --- Setup timer for elapsed seconds ---
-        self.elapsed_seconds = 0
-        self.timer = QTimer()
-        self.timer.timeout.connect(lambda: self._update_timer_title(title))
-        self.timer.start(1000)
+                         task_args=(), task_kwargs={}, on_cancel=None, priority=PRIORITY_NORMAL):
+        """
+        Start task_function in the background and return its TaskHandle.
+        on_complete(processed_data, fetched_at, original_id) gets the task's
+        result, split when the task returns a (data, id) pair.
+        """
+        handle = self.scheduler.create_task(task_function, task_args, task_kwargs, priority, title)
 
-        # --- Create worker thread ---
-        self.worker_thread = GenericWorkerThread(task_function, *task_args, **task_kwargs)
+        # --- Show progress dialog ---
+        dialog = TaskProgressDialog(handle, loading_text, title, self.parent)
+        self.dialogs[handle.id] = dialog
+        dialog.show()
 
-        # Connect signals
+        # Connect signals before the task starts so none are missed
         if on_complete:
-            self.worker_thread.finished.connect(lambda result: self._handle_completion(result, on_complete))
+            handle.finished.connect(lambda result: self._handle_completion(handle, result, on_complete))
         else:
-            self.worker_thread.finished.connect(self._close_dialog)
+            handle.finished.connect(lambda result: self._close_dialog(handle))
 
         if on_error:
-            self.worker_thread.error.connect(lambda err: self._handle_error(err, on_error))
+            handle.error.connect(lambda err: self._handle_error(handle, err, on_error))
         else:
-            self.worker_thread.error.connect(self._show_error)
+            handle.error.connect(lambda err: self._show_error(handle, err))
+
+        handle.cancelled.connect(lambda: self._handle_cancelled(handle, on_cancel))
 
         # handle pauses (e.g. missing data, user confirmation)
         if on_pause:
-            self.worker_thread.pause_requested.connect(on_pause)
+            handle.pause_requested.connect(on_pause)
 
-        self.worker_thread.start()
+        return self.scheduler.start(handle)
 
-    def _update_timer_title(self, base_title):
-        self.elapsed_seconds += 1
-        if self.progress_dialog:
-            self.progress_dialog.setWindowTitle(f"{base_title} ({self.elapsed_seconds}s)")
+    def cancel_all(self):
+        for dialog in list(self.dialogs.values()):
+            dialog.request_cancel()
 
-    def _handle_completion(self, result, callback):
+    def _handle_completion(self, handle, result, callback):
         try:
             processed_data, original_id = result
         except Exception:
             processed_data = result
             original_id = None
 
-        self._close_dialog()
-        fetched_at = getattr(self, "fetched_at", datetime.now().strftime('%Y-%m-%d, %H:%M:%S'))
+        self._close_dialog(handle)
+        fetched_at = datetime.now().strftime('%Y-%m-%d, %H:%M:%S')
         callback(processed_data, fetched_at, original_id)
 
-
-    def _handle_error(self, error, callback):
-        self._close_dialog()
+    def _handle_error(self, handle, error, callback):
+        self._close_dialog(handle)
         callback(error)
 
-    def _close_dialog(self):
-        if self.progress_dialog:
-            self.progress_dialog.close()
-        if self.timer:
-            self.timer.stop()
-        self.elapsed_seconds = 0
+    def _handle_cancelled(self, handle, callback=None):
+        self._close_dialog(handle)
+        print(f"Task cancelled: {handle.name}")
+        if callback:
+            callback()
+
+    def _close_dialog(self, handle):
+        dialog = self.dialogs.pop(handle.id, None)
+        if dialog:
+            dialog.finish()
 
-    def _show_error(self, message):
-        self._close_dialog()
+    def _show_error(self, handle, message):
+        self._close_dialog(handle)
         print(f"Error: {message}")
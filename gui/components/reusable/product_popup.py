@@ -175,10 +175,10 @@ class AddProductPopup(QDialog):
 # Example usage:
 """
 from gui.components.dynamic_table_widget import DynamicTableWidget
-from database.products import fetch_products
+from utils.product_catalog import get_product_catalog
 
 def open_product_selection():
-    products = fetch_products()
+    products = get_product_catalog().products()
     dialog = ProductSelectionPopup(products, DynamicTableWidget, self)
     
     # Connect to the product_selected signal if you want to handle the selection in a callback
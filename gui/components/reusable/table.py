@@ -1,16 +1,216 @@
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QLineEdit, QTableWidget, QTableWidgetItem, QHeaderView
+    QWidget, QVBoxLayout, QLineEdit, QTableView, QTableWidgetItem, QHeaderView
+)
+from PyQt5.QtCore import (
+    Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, QTimer, pyqtSignal
 )
 
-class DynamicTableWidget(QWidget):
+# Joins a row's cells in the search haystack, a query can't match across cells
+CELL_SEPARATOR = "\x1f"
+
+# Roles copied from the formatted QTableWidgetItem into the model
+ITEM_ROLES = (
+    Qt.DisplayRole, Qt.FontRole, Qt.ForegroundRole, Qt.BackgroundRole,
+    Qt.TextAlignmentRole, Qt.ToolTipRole, Qt.DecorationRole
+)
+
+
+class DynamicTableItem(QTableWidgetItem):
+    """
+    QTableWidgetItem handed to cell_format_callback and returned by
+    DynamicTableView.item(), so existing callers can keep using row()/text().
+    """
+
+    def __init__(self, text):
+        super().__init__(text)
+        self.view_row = -1
+        self.view_column = -1
+
+    def row(self):
+        return self.view_row
+
+    def column(self):
+        return self.view_column
+
+
+class DynamicTableModel(QAbstractTableModel):
+    """
+    Read-only model over a list of rows. Cells are formatted lazily, the
+    first time the view asks for them, so only rows that get scrolled into
+    view ever build an item or run the format callback.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.headers = []
+        self.rows = []
+        self.cell_format_callback = None
+        self._items = {}
+        # Lowercased text of every row, built once per populate for searching
+        self.haystacks = []
+        self.generation = 0
+
+    def set_rows(self, headers, rows, cell_format_callback=None):
+        self.beginResetModel()
+        self.headers = list(headers)
+        self.rows = rows
+        self.cell_format_callback = cell_format_callback
+        self._items = {}
+        self.haystacks = [
+            CELL_SEPARATOR.join(str(cell).lower() for cell in row_data)
+            for row_data in rows
+        ]
+        self.generation += 1
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def item(self, row, column):
+        """The formatted item for a cell, built and cached on first use."""
+        key = (row, column)
+        item = self._items.get(key)
+        if item is None:
+            row_data = self.rows[row]
+            value = row_data[column] if column < len(row_data) else ""
+            item = DynamicTableItem(str(value))
+            if self.cell_format_callback:
+                item = self.cell_format_callback(item, row, column, value) or item
+            self._items[key] = item
+        return item
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in ITEM_ROLES:
+            return None
+        return self.item(index.row(), index.column()).data(role)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if self.cell_format_callback:
+            return self.item(index.row(), index.column()).flags() & ~Qt.ItemIsEditable
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.headers[section] if section < len(self.headers) else None
+        return section + 1
+
+
+class DynamicTableFilterProxy(QSortFilterProxyModel):
+    """
+    Keeps rows where any cell contains the search query (case-insensitive).
+
+    When a query extends the previous one (typing another character) only
+    the rows that already matched are searched again.
+    """
+
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.query = ""
+        self.matched_rows = None
+        self._matched_set = None
+        self._matched_generation = None
+
+    def set_query(self, query):
+        query = (query or "").lower()
+        source_model = self.sourceModel()
+
+        if not query:
+            self.matched_rows = None
+        else:
+            if (self.matched_rows is not None and self.query and self.query in query
+                    and self._matched_generation == source_model.generation):
+                candidates = self.matched_rows
+            else:
+                candidates = range(len(source_model.haystacks))
+            haystacks = source_model.haystacks
+            # Source row order, so filtered results stay in table order
+            self.matched_rows = [row for row in candidates if query in haystacks[row]]
+            self._matched_generation = source_model.generation
+
+        self.query = query
+        self._matched_set = set(self.matched_rows) if self.matched_rows is not None else None
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self.matched_rows is None:
+            return True
+        return source_row in self._matched_set
+
+
+class DynamicTableView(QTableView):
+    """
+    QTableView with the parts of the QTableWidget API the windows use
+    (cellDoubleClicked, item, selectedItems, clear, setRowCount ...).
+    Row numbers are the visible (filtered) rows, as they were before.
+    """
+    cellDoubleClicked = pyqtSignal(int, int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.doubleClicked.connect(lambda index: self.cellDoubleClicked.emit(index.row(), index.column()))
+
+    def source_row(self, row):
+        proxy = self.model()
+        return proxy.mapToSource(proxy.index(row, 0)).row()
+
+    def item(self, row, column):
+        proxy = self.model()
+        if not (0 <= row < proxy.rowCount()) or not (0 <= column < proxy.columnCount()):
+            return None
+        item = proxy.sourceModel().item(self.source_row(row), column)
+        item.view_row = row
+        item.view_column = column
+        return item
+
+    def selectedItems(self):
+        indexes = sorted(self.selectedIndexes(), key=lambda index: (index.row(), index.column()))
+        return [self.item(index.row(), index.column()) for index in indexes]
+
+    def rowCount(self):
+        return self.model().rowCount()
+
+    def columnCount(self):
+        return self.model().columnCount()
+
+    def clear(self):
+        self.model().sourceModel().set_rows([], [])
+
+    def setRowCount(self, count):
+        if count == 0:
+            self.clear()
+
+    def setColumnCount(self, count):
+        if count == 0:
+            self.clear()
+
+
+class DynamicTableWidget(QWidget):
+    def __init__(self, parent=None, search_delay_ms=200):
+        super().__init__(parent)
 
         self.search_bar = QLineEdit(self)
         self.search_bar.setPlaceholderText("Search...")
-        self.search_bar.textChanged.connect(self.search)
 
-        self.table = QTableWidget(self)
+        # Wait for a pause in typing before filtering
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(search_delay_ms)
+        self.search_timer.timeout.connect(lambda: self.search(self.search_bar.text()))
+        self.search_bar.textChanged.connect(lambda _: self.search_timer.start())
+
+        self.model = DynamicTableModel(self)
+        self.proxy_model = DynamicTableFilterProxy(self)
+        self.proxy_model.setSourceModel(self.model)
+
+        self.table = DynamicTableView(self)
+        self.table.setModel(self.proxy_model)
 
         layout = QVBoxLayout(self)
         layout.addWidget(self.search_bar)
@@ -25,38 +225,23 @@ class DynamicTableWidget(QWidget):
     def populate(self, headers, data, cell_format_callback=None):
         self.headers = headers
         self.cell_format_callback = cell_format_callback
-        if not self.data:
-            self.data = data
+        self.data = data
 
-        self.table.clear()
-        self.table.setColumnCount(len(headers))
-        self.table.setRowCount(len(data))
-        self.table.setHorizontalHeaderLabels(headers)
+        self.model.set_rows(headers, data, cell_format_callback)
 
         for index in range(len(headers)):
             self.table.horizontalHeader().setSectionResizeMode(index, QHeaderView.Stretch)
 
-        for row_idx, row_data in enumerate(data):
-            for col_idx, value in enumerate(row_data):
-                item = QTableWidgetItem(str(value))
-                if cell_format_callback:
-                    item = cell_format_callback(item, row_idx, col_idx, value)
-                self.table.setItem(row_idx, col_idx, item)
-
-        self.table.resizeColumnsToContents()
-        self.table.resizeRowsToContents()
+        # Keep whatever is in the search bar applied to the new data
+        self.search(self.search_bar.text())
 
     def search(self, query):
-        if not query:
-            filtered_data = self.data
+        self.search_timer.stop()
+        self.proxy_model.set_query(query)
+        if query:
+            self.filtered_result = [self.data[row] for row in self.proxy_model.matched_rows]
         else:
-            query = query.lower()
-            filtered_data = [
-                row for row in self.data
-                if any(query in str(cell).lower() for cell in row)
-            ]
-        self.filtered_result = filtered_data
-        self.populate(self.headers, filtered_data, self.cell_format_callback)
+            self.filtered_result = self.data
 
     def return_row(self):
         if self.filtered_result:
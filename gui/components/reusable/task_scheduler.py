@@ -0,0 +1,172 @@
+import itertools
+import os
+import threading
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from utils.task_context import TaskContext, TaskCancelled, accepts_keyword
+
+# Queued tasks with a higher priority start first
+PRIORITY_BACKGROUND = -1
+PRIORITY_NORMAL = 0
+PRIORITY_HIGH = 1
+
+# Each running task may hold a database connection, database/connection.py sizes
+# DB_POOL_MAX from this setting (plus headroom for the GUI thread) unless it's set
+TASK_SCHEDULER_MAX_WORKERS = int(os.getenv('TASK_SCHEDULER_MAX_WORKERS') or 4)
+
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class TaskHandle(QObject):
+    """
+    One task submitted to the TaskScheduler.
+
+    Signals are emitted from the pool thread and delivered on the GUI
+    thread, so slots connected to them can touch widgets.
+    """
+    finished = pyqtSignal(object)
+    error = pyqtSignal(str)
+    progress = pyqtSignal(int, int)
+    stage_changed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    pause_requested = pyqtSignal(object)  # Generic signal for "pause and ask user"
+    task_done = pyqtSignal(object)  # The handle, after finished, error or cancelled
+
+    _ids = itertools.count(1)
+
+    def __init__(self, task_function, task_args=(), task_kwargs=None, priority=PRIORITY_NORMAL, name=None):
+        super().__init__()
+        self.id = next(TaskHandle._ids)
+        self.task_function = task_function
+        self.args = tuple(task_args)
+        self.kwargs = dict(task_kwargs or {})
+        self.priority = priority
+        self.name = name or getattr(task_function, "__name__", "task")
+        self.state = QUEUED
+        self.context = TaskContext(self.progress.emit, self.stage_changed.emit)
+
+    @property
+    def cancellable(self):
+        """Only tasks that take a context can check for cancellation."""
+        return accepts_keyword(self.task_function, "context")
+
+    def cancel(self):
+        """Stop the task, straight away if it hasn't started yet."""
+        self.context.cancel()
+
+    def is_done(self):
+        return self.state in (FINISHED, FAILED, CANCELLED)
+
+    def run(self):
+        """Runs the task on a pool thread."""
+        if self.context.cancelled:
+            self._settle(CANCELLED, self.cancelled)
+            return
+
+        self.state = RUNNING
+        try:
+            kwargs = dict(self.kwargs)
+            if self.cancellable:
+                # Progress, stages and cancellation all go through the context
+                kwargs.setdefault("context", self.context)
+            elif "on_progress" not in kwargs and accepts_keyword(self.task_function, "on_progress"):
+                # Tasks that take on_progress can report (done, total) through the progress signal
+                kwargs["on_progress"] = self.progress.emit
+
+            # Pass a callback to the task so it can trigger a pause event
+            result = self.task_function(*self.args, on_pause=self.pause_requested.emit, **kwargs)
+            if self.context.cancelled:
+                self._settle(CANCELLED, self.cancelled)
+            else:
+                self._settle(FINISHED, self.finished, result)
+        except TaskCancelled:
+            self._settle(CANCELLED, self.cancelled)
+        except Exception as e:
+            if self.context.cancelled:
+                self._settle(CANCELLED, self.cancelled)
+            else:
+                self._settle(FAILED, self.error, str(e))
+
+    def _settle(self, state, signal, *args):
+        self.state = state
+        signal.emit(*args)
+        self.task_done.emit(self)
+
+
+class _TaskRunnable(QRunnable):
+    def __init__(self, handle):
+        super().__init__()
+        self.handle = handle
+
+    def run(self):
+        self.handle.run()
+
+
+class TaskScheduler(QObject):
+    """
+    Runs background tasks on a shared QThreadPool.
+
+    Any number of tasks can be submitted from any window; at most
+    max_workers run at once and the rest wait, highest priority first.
+    The scheduler keeps every handle alive until its task has settled.
+    """
+
+    def __init__(self, max_workers=None):
+        super().__init__()
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(max_workers or TASK_SCHEDULER_MAX_WORKERS)
+        self.handles = {}
+
+    def create_task(self, task_function, task_args=(), task_kwargs=None, priority=PRIORITY_NORMAL, name=None):
+        """Build a handle without starting it, so signals can be connected first."""
+        return TaskHandle(task_function, task_args, task_kwargs, priority, name)
+
+    def start(self, handle):
+        self.handles[handle.id] = handle
+        handle.task_done.connect(self._forget)
+        self.pool.start(_TaskRunnable(handle), handle.priority)
+        return handle
+
+    def submit(self, task_function, task_args=(), task_kwargs=None, priority=PRIORITY_NORMAL, name=None,
+               on_complete=None, on_error=None, on_cancel=None):
+        """Start a task and return its handle, on_complete gets the task's return value."""
+        handle = self.create_task(task_function, task_args, task_kwargs, priority, name)
+        if on_complete:
+            handle.finished.connect(on_complete)
+        if on_error:
+            handle.error.connect(on_error)
+        if on_cancel:
+            handle.cancelled.connect(on_cancel)
+        return self.start(handle)
+
+    def _forget(self, handle):
+        self.handles.pop(handle.id, None)
+
+    def active_tasks(self):
+        return list(self.handles.values())
+
+    def cancel_all(self):
+        for handle in self.active_tasks():
+            handle.cancel()
+
+    def shutdown(self, timeout_ms=5000):
+        """Cancel everything and give running tasks a moment to stop."""
+        self.cancel_all()
+        self.pool.waitForDone(timeout_ms)
+
+
+_task_scheduler = None
+_task_scheduler_lock = threading.Lock()
+
+
+def get_task_scheduler():
+    """Return the application-wide TaskScheduler, creating it on first use."""
+    global _task_scheduler
+    if _task_scheduler is None:
+        with _task_scheduler_lock:
+            if _task_scheduler is None:
+                _task_scheduler = TaskScheduler()
+    return _task_scheduler
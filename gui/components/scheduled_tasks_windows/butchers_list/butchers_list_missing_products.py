@@ -0,0 +1,68 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QListWidget,
+    QListWidgetItem, QPushButton
+)
+from PyQt5.QtCore import Qt
+from gui.components.scheduled_tasks_windows.butchers_list.butchers_list_add_new_product import AddProductDialog
+
+
+class MissingProductsDialog(QDialog):
+    """Lists every product from a pull that isn't in the database yet."""
+
+    def __init__(self, missing_products, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Missing Products")
+        self.missing_products = missing_products
+        self.added_products = []
+
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.info_label = QLabel(self)
+        layout.addWidget(self.info_label)
+
+        self.product_list = QListWidget(self)
+        for product in self.missing_products:
+            item = QListWidgetItem(f"{product.get('sage_code', '')} - {product.get('description') or ''}")
+            item.setData(Qt.UserRole, product)
+            self.product_list.addItem(item)
+        self.product_list.itemDoubleClicked.connect(self.add_product)
+        layout.addWidget(self.product_list)
+
+        button_layout = QHBoxLayout()
+
+        self.add_button = QPushButton("Add Selected", self)
+        self.add_button.clicked.connect(lambda: self.add_product(self.product_list.currentItem()))
+
+        self.close_button = QPushButton("Close", self)
+        self.close_button.clicked.connect(self.accept)
+
+        button_layout.addWidget(self.add_button)
+        button_layout.addStretch(1)
+        button_layout.addWidget(self.close_button)
+        layout.addLayout(button_layout)
+
+        self.update_info_label()
+
+    def update_info_label(self):
+        count = self.product_list.count()
+        self.info_label.setText(f"{count} product(s) on these orders are not in the database:")
+        self.add_button.setEnabled(count > 0)
+
+    def add_product(self, item):
+        if item is None:
+            return
+
+        product = item.data(Qt.UserRole)
+        dialog = AddProductDialog(
+            sage_code=product.get("sage_code", ""),
+            product_description=product.get("description"),
+            parent=self
+        )
+        if dialog.exec_():
+            # Dialog handled the DB insert itself
+            self.added_products.append(product)
+            self.product_list.takeItem(self.product_list.row(item))
+            self.update_info_label()
@@ -12,7 +12,7 @@ from controllers.sage_controllers.invoices import *
 from gui.components.scheduled_tasks_windows.butchers_list.butchers_list_table import ButchersListTable
 from utils.butchers_list_utils import get_invoice_products, refresh_get_invoice_products
 from resources.excel_exporter import ExcelExporter
-from gui.components.scheduled_tasks_windows.butchers_list.butchers_list_add_new_product import AddProductDialog
+from gui.components.scheduled_tasks_windows.butchers_list.butchers_list_missing_products import MissingProductsDialog
 
 
 class ButchersListWindow(QWidget):
@@ -93,23 +93,17 @@ class ButchersListWindow(QWidget):
             on_complete=self.on_fetch_complete,
             on_error=self.on_fetch_error,
             on_pause=self.handle_product_pause,
+            on_cancel=self.on_fetch_cancelled,
             loading_text="Fetching invoice data...",
             title="Loading Invoices",
             task_args=(self.date,)
         )
 
     def handle_product_pause(self, data):
-        if data.get("type") == "missing_product":
-            sage_code = data.get("sage_code", "")
-            product_description = data.get("description")
-
-            dialog = AddProductDialog(sage_code=sage_code, product_description=product_description, parent=self)
-            if dialog.exec_():
-                # Success — dialog handled the DB insert itself
-                print("Added product:", dialog.product_data)
-                return True, dialog.product_data  # clean return value
-            else:
-                return False, None
+        if data.get("type") == "missing_products":
+            dialog = MissingProductsDialog(data.get("products", []), parent=self)
+            dialog.exec_()
+            return bool(dialog.added_products), dialog.added_products
 
     
     def on_fetch_complete(self, invoices, updated_at, original_id=None):
@@ -135,6 +129,10 @@ class ButchersListWindow(QWidget):
         print(error_message)
         self.status_label.setText(f"Error fetching invoices: {error_message}")
 
+    def on_fetch_cancelled(self):
+        self.pull_orders_button.setEnabled(True)
+        self.status_label.setText("Fetching invoices was cancelled.")
+
     def refresh_pull_butcher_data(self):
         # Disable the button to prevent multiple clicks
         self.pull_orders_button.setEnabled(False)  # Fixed: was using general_settings_button
@@ -151,6 +149,7 @@ class ButchersListWindow(QWidget):
             on_complete=self.refresh_on_fetch_complete,
             on_error=self.refresh_on_fetch_error,
             on_pause=self.handle_product_pause,
+            on_cancel=self.on_fetch_cancelled,
             loading_text="Fetching invoice data...",
             title="Loading Invoices",
             task_args=(self.date, selected_butchers_list,)
@@ -3,16 +3,20 @@ from PyQt5.QtWidgets import (
     QWidget, QPushButton, QLabel, QMessageBox,
     QVBoxLayout, QFrame, QHBoxLayout, QMainWindow
 )
-from matplotlib.dates import relativedelta
+from dateutil.relativedelta import relativedelta
 from auth.userAuthentication import AuthService
 from controllers.sage_controllers.invoice_products import get_invoice_items_between_time_frame, get_invoice_items_id
-from database.products import fetch_products
+from utils.product_catalog import get_product_catalog
+from utils.task_context import TaskContext
 from database.reports import fetch_report_by_id
 from gui.components.reusable.animations.loading_component import LoadingManager
 from controllers.sage_controllers.invoices import *
 from gui.components.reusable.date_input_dialog import DateInputDialog
 from resources.excel_exporter import ExcelExporter
-from utils.mpp_report_utils import add_customer_mpp_report, remove_customer_mpp_report
+from utils.mpp_report_utils import (
+    add_customer_mpp_report, remove_customer_mpp_report, build_unit_of_measurement_index,
+    group_customer_invoices, group_invoice_items, get_customer_invoice_items
+)
 
 class MPPReport(QWidget):
 
@@ -80,6 +84,7 @@ class MPPReport(QWidget):
             on_complete=self.on_fetch_complete,
             on_error=self.on_fetch_error,
             on_pause=self.handle_pause,
+            on_cancel=self.on_fetch_cancelled,
             loading_text="Fetching invoice data...",
             title="Loading Invoices",
             task_args=(self.date, chosen_date, self.report)
@@ -94,17 +99,37 @@ class MPPReport(QWidget):
             on_complete=self.on_fetch_complete,
             on_error=self.on_fetch_error,
             on_pause=self.handle_pause,
+            on_cancel=self.on_fetch_cancelled,
             loading_text="Fetching invoice data...",
             title="Loading Invoices",
             task_args=(self.date, self.previous_week, self.report)
         )
 
-    def create_report(self, date, previous_week, report, on_pause=None):
+    def create_report(self, date, previous_week, report, on_pause=None, context=None):
+        context = context or TaskContext()
+        context.set_stage("Fetching invoices")
         invoices = get_the_last_weeks_invoices(date, previous_week)
-        invoice_ids = self.get_customer_invoice_ids(invoices, report.customers)
-        invoice_items_for_week = get_invoice_items_id(invoice_ids)
-        customer_invoices = self.get_customer_invoices(invoices, report.customers)
-        customer_invoice_items = self.get_customer_invoice_items(invoice_items_for_week, customer_invoices, report.customers)
+        context.check_cancelled()
+        # None means Sage couldn't be reached, which mustn't look like an empty week
+        if invoices is None:
+            raise RuntimeError("Failed to fetch invoices from Sage")
+
+        customer_invoices, invoice_numbers = group_customer_invoices(invoices, report.customers)
+        context.set_stage("Fetching invoice items")
+        invoice_items = get_invoice_items_id(
+            invoice_numbers, on_progress=context.progress_callback("Fetching invoice items"), invoices_date=date
+        )
+        if invoice_items is None:
+            raise RuntimeError("Failed to fetch invoice items from Sage")
+        items_by_invoice = group_invoice_items(invoice_items)
+        context.check_cancelled()
+
+        # One products query per report, not one per invoice
+        context.set_stage("Building report")
+        unit_of_measurement_index = build_unit_of_measurement_index(get_product_catalog().products())
+        customer_invoice_items = get_customer_invoice_items(
+            items_by_invoice, customer_invoices, report.customers, unit_of_measurement_index
+        )
         return customer_invoice_items, None
 
     def on_fetch_complete(self, customer_invoice_data, updated_at, original_id=None):
@@ -130,12 +155,16 @@ class MPPReport(QWidget):
         print(error_message)
         self.status_label.setText(f"Error fetching invoices: {error_message}")
     
+    def on_fetch_cancelled(self):
+        self.create_report_button.setEnabled(True)
+        self.status_label.setText("Creating the report was cancelled.")
+
     def handle_pause(self):
         pass
 
     def export_detailed_report(self):
         """Export detailed report with all invoice items"""
-        # Flatten the data for detailed export
+        # Rows are generated as the exporter writes them, so large reports stay out of memory
         flattened_data = self.flatten_invoice_data(self.customer_invoice_data)
 
         # Define headers for detailed report (using display names)
@@ -165,8 +194,7 @@ class MPPReport(QWidget):
         
 
     def flatten_invoice_data(self, customer_data):
-        """Convert nested invoice data to flat structure for Excel export"""
-        flattened = []
+        """Yield nested invoice data as flat rows for Excel export"""
         
         for customer in customer_data:
             # Skip locations with no data
@@ -206,79 +234,4 @@ class MPPReport(QWidget):
                               'total_price': item.get('total_price', 0),
                               'unit_of_measurement': item.get('unit_of_measurement', 0)
                           })
-                          flattened.append(row)
-        
-        return flattened
-
-    def get_customer_invoices(self, invoices, customers):
-        customer_invoices = {}
-        for customer in customers:
-            # Use consistent dictionary access
-            customer_invoices[customer["sage_code"]] = []
-            for invoice in invoices:
-                if customer["sage_code"] == invoice["accountRef"]:
-                    customer_invoices[customer["sage_code"]].append(invoice)
-        return customer_invoices
-    
-    def get_customer_invoice_ids(self, invoices, customers):
-        customer_invoices = {}
-        for customer in customers:
-            # Use consistent dictionary access
-            customer_invoices[customer["sage_code"]] = []
-            for invoice in invoices:
-                if customer["sage_code"] == invoice["accountRef"]:
-                    customer_invoices[customer["sage_code"]].append(invoice["invoiceNumber"])
-        return customer_invoices
-        
-    def get_customer_invoice_items(self, invoice_items_for_week, customer_invoices, customers):
-        for customer in customers:
-            customer["data"] = []  # Initialize as empty list instead of dict
-            for customer_invoice in customer_invoices[customer["sage_code"]]:
-                invoice_data = {
-                    "invoice_number": customer_invoice["invoiceNumber"],
-                    "invoice_date": customer_invoice["invoiceDate"],
-                    "invoice_items": self.filter_invoice_items(invoice_items_for_week, customer_invoice["invoiceNumber"])
-                }
-                customer["data"].append(invoice_data)  # Append each invoice as an object to the list
-        return customers
-
-    def filter_invoice_items(self, invoice_items_for_week, customer_invoice_number):    
-        supabase_items =  fetch_products()
-        items = []
-        for invoice_item in invoice_items_for_week:
-            invoice_item_number = invoice_item["invoiceNumber"]
-            if int(invoice_item_number) == int(customer_invoice_number):
-                item_data = {
-                    "product_code": invoice_item["stockCode"],
-                    "product_description": invoice_item["description"],
-                    "product_unit_price": invoice_item["unitPrice"],
-                    "amount": invoice_item["quantity"],
-                    "total_price": invoice_item["netAmount"],
-                    "unit_of_measurement": self.get_unit_of_measurement(supabase_items, invoice_item["stockCode"])
-                }
-                items.append(item_data)
-        return items
-    
-    def get_unit_of_measurement(self, supabase_items, stockCode):
-        for supabase_item in supabase_items:
-            sage_code = supabase_item.sage_code
-            
-            try:
-                # Try to parse as JSON first
-                parsed_sage_codes = json.loads(sage_code)
-                
-                if isinstance(parsed_sage_codes, str):
-                    # JSON string value
-                    if parsed_sage_codes == stockCode:
-                        return supabase_item.sold_as
-                elif isinstance(parsed_sage_codes, list):
-                    # JSON array
-                    if stockCode in parsed_sage_codes:
-                        return supabase_item.sold_as
-                        
-            except (json.JSONDecodeError, TypeError):
-                # If JSON parsing fails, treat as plain string
-                if isinstance(sage_code, str) and sage_code == stockCode:
-                    return supabase_item.sold_as
-        
-        return None
+                          yield row
@@ -4,14 +4,14 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtGui import QFont
-from database.products import fetch_products
+from utils.product_catalog import get_product_catalog
 
 class DeliveryDetailWindow(QMainWindow):
     def __init__(self, deliveries, current_index, parent=None):
         super().__init__(parent)
         self.deliveries = deliveries
         self.current_index = current_index
-        self.products = fetch_products()
+        self.products = get_product_catalog().products()
         
         # Create product lookup dictionaries
         self.product_lookup = {product.id: product.name for product in self.products}
@@ -5,21 +5,36 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
 from datetime import date, datetime, timedelta
-from database.deliveries import fetch_deliveries_by_week
-from database.products import fetch_products
+from database.deliveries import fetch_deliveries_by_week, get_week_bounds
+from utils.product_catalog import get_product_catalog
+from gui.components.reusable.task_scheduler import get_task_scheduler, PRIORITY_BACKGROUND
 from gui.components.reusable.table import DynamicTableWidget
 from gui.components.stock_windows.goods_in.delivery_detail_window import DeliveryDetailWindow
 
 
 
+def fetch_deliveries_for_weeks(chosen_dates, on_pause=None):
+    """Fetch several weeks of deliveries, keyed by the week's Monday."""
+    return {
+        get_week_bounds(chosen_date)[0]: fetch_deliveries_by_week(chosen_date)
+        for chosen_date in chosen_dates
+    }
+
+
 class GoodsInWindow(QWidget):
 
-    def __init__(self):
+    def __init__(self, prefetch_adjacent_weeks=True):
         super().__init__()
         self.chosen_date = datetime.now()
         self.deliveries = []  # Store deliveries for detail window
+        # Deliveries per week (keyed by Monday), so Previous / Next Week can load from memory
+        self.prefetch_adjacent_weeks = prefetch_adjacent_weeks
+        self.week_cache = {}
+        # Bumped by Refresh, so prefetches started before it are dropped
+        self.cache_generation = 0
+        self.prefetch_task = None
         # Create product lookup dictionary once for O(1) access
-        self.product_lookup = {product.id: product.name for product in fetch_products()}
+        self.product_lookup = get_product_catalog().id_to_name()
         self.layout = QVBoxLayout()
 
         button_layout = QHBoxLayout()
@@ -60,7 +75,8 @@ class GoodsInWindow(QWidget):
 
     def load_product_table(self):
         """Load product data into the table."""
-        self.deliveries = fetch_deliveries_by_week(self.chosen_date)
+        self.deliveries = self.get_week_deliveries(self.chosen_date)
+        self.prefetch_weeks()
 
         if not self.deliveries:
             self.label.setText("No data found.")
@@ -115,6 +131,48 @@ class GoodsInWindow(QWidget):
         
         self.table.cellDoubleClicked.connect(self.open_delivery_detail)
 
+    def get_week_deliveries(self, chosen_date):
+        """Deliveries for the week of chosen_date, from the cache when we already have them."""
+        week_start = get_week_bounds(chosen_date)[0]
+        if week_start not in self.week_cache:
+            self.week_cache[week_start] = fetch_deliveries_by_week(chosen_date)
+        return self.week_cache[week_start]
+
+    def prefetch_weeks(self):
+        """Load the previous and next week in the background."""
+        if not self.prefetch_adjacent_weeks:
+            return
+        if self.prefetch_task and not self.prefetch_task.is_done():
+            return
+
+        adjacent_dates = [
+            adjacent_date for adjacent_date in (
+                self.chosen_date - timedelta(weeks=1),
+                self.chosen_date + timedelta(weeks=1)
+            )
+            if get_week_bounds(adjacent_date)[0] not in self.week_cache
+        ]
+        if not adjacent_dates:
+            return
+
+        # Background priority, so it waits behind anything the user is waiting on
+        self.prefetch_task = get_task_scheduler().submit(
+            fetch_deliveries_for_weeks,
+            task_args=(adjacent_dates,),
+            priority=PRIORITY_BACKGROUND,
+            name="Prefetch deliveries",
+            on_complete=lambda weeks, generation=self.cache_generation: self.on_prefetch_complete(weeks, generation),
+            on_error=lambda error: print(f"Error prefetching deliveries: {error}")
+        )
+
+    def on_prefetch_complete(self, weeks, generation):
+        if generation != self.cache_generation:
+            # Started before a Refresh, so it may hold deliveries the refresh threw away
+            return
+        for week_start, deliveries in weeks.items():
+            # A week loaded on demand since this prefetch started is the newer copy
+            self.week_cache.setdefault(week_start, deliveries)
+
     def open_delivery_detail(self, row_idx, col_idx):
         """Open the delivery detail window when double-clicking on Product column (similar to EditProductWindow)."""
         if col_idx == 0 and row_idx < len(self.deliveries):  # Only open on Product column (first column)
@@ -135,5 +193,12 @@ class GoodsInWindow(QWidget):
         self.repaint()  # Force UI refresh
     
     def refresh_table(self):
+        # Refresh always goes back to the database
+        self.cache_generation += 1
+        if self.prefetch_task:
+            # Stops it if it hasn't started, either way its result is ignored
+            self.prefetch_task.cancel()
+            self.prefetch_task = None
+        self.week_cache.clear()
         self.setup_ui()
         self.repaint()  # Force UI refresh
@@ -5,7 +5,8 @@ from PyQt5.QtWidgets import (
     QVBoxLayout, QFrame, QHBoxLayout, QMessageBox, QDialog
 )
 
-from database.products import fetch_products, fetch_products_by_ids
+from database.products import fetch_products_by_ids
+from utils.product_catalog import get_product_catalog
 from database.reports import fetch_report_by_id, update_report
 from database.stock_sold_reports import fetch_stock_sold_report_by_date, insert_stock_sold_report, update_stock_sold_report
 from gui.components.reusable.animations.loading_component import LoadingManager
@@ -107,7 +108,7 @@ class StockSoldReportWindow(QWidget):
       if remove:
           dialog = AddProductPopup(self.report_products, DynamicTableWidget)
       else:
-          products = fetch_products()
+          products = get_product_catalog().products()
           dialog = AddProductPopup(products, DynamicTableWidget)
       
       result = dialog.exec_()
@@ -129,6 +130,7 @@ class StockSoldReportWindow(QWidget):
           on_complete=self.on_fetch_complete,
           on_error=self.on_fetch_error,
           on_pause=self.handle_pause,
+          on_cancel=self.on_fetch_cancelled,
           loading_text="Fetching invoice data...",
           title="Loading Invoices",
           task_args=(self.date, self.report_products,)
@@ -159,6 +161,10 @@ class StockSoldReportWindow(QWidget):
       print(error_message)
       self.status_label.setText(f"Error fetching invoices: {error_message}")
 
+  def on_fetch_cancelled(self):
+      self.create_report_button.setEnabled(True)
+      self.status_label.setText("Creating the report was cancelled.")
+
   def handle_pause(self):
       pass
   
@@ -3,9 +3,9 @@ from PyQt5.QtWidgets import (
     QWidget, QDoubleSpinBox, QPushButton, QLabel, QScrollArea, QDateEdit,
     QVBoxLayout, QFrame, QHBoxLayout, QMainWindow, QGridLayout, QMessageBox
 )
-from database.products import fetch_products_stock_take, update_product, fetch_products
+from utils.product_catalog import get_product_catalog
 from resources.pdf_exporter import export_to_pdf 
-from database.stock_takes import insert_stock_take, fetch_most_recent_stock_take
+from database.stock_takes import save_stock_take, fetch_most_recent_stock_take
 from gui.components.reusable.date_input_dialog import DateInputDialog
 import json
 from datetime import datetime
@@ -87,12 +87,12 @@ class StockTakeNewWindow(QMainWindow):
 
   def load_specific_data(self, stock_category):
     self.category = stock_category
-    self.data = fetch_products_stock_take(stock_category)
+    self.data = {stock_category: get_product_catalog().by_stock_category(stock_category)}
     self.render_stock_form()
 
   def load_all_data(self):
     self.category = 'all'
-    results = fetch_products() 
+    results = get_product_catalog().products()
     self.data = {}  # Ensure it's a clean dictionary before populating
 
     for product in results:
@@ -201,18 +201,19 @@ class StockTakeNewWindow(QMainWindow):
       dialog = DateInputDialog(self)
       if dialog.exec_():  # If user clicks OK
         date = dialog.get_date()  # Get selected date
-      for product_id, spin_box in self.spin_boxes.items():
-        updated_data[product_id] = spin_box.value()
-    else:
-      for product_id, spin_box in self.spin_boxes.items():
-        updated_data[product_id] = spin_box.value()
-        update_product(product_id, stock_count=spin_box.value())
+    for product_id, spin_box in self.spin_boxes.items():
+      updated_data[product_id] = spin_box.value()
+
+    # Only a stock take done today reflects current stock levels
+    stock_counts = updated_data if response == QMessageBox.Yes else None
     
     # Process the stock take data
     json_data = json.dumps(updated_data)
 
-    # Insert stock take with selected date
-    insert_stock_take(json_data, str(self.category), date)
+    # Insert stock take with selected date and write the counts back in one transaction
+    if not save_stock_take(json_data, str(self.category), date, stock_counts):
+      QMessageBox.warning(self, "Save failed", "The stock take could not be saved, please try again.")
+      return
 
     # Reset the form after saving
     self.reset_ui()
@@ -243,8 +244,9 @@ class StockTakeNewWindow(QMainWindow):
     self.last_stock_take_layout = QVBoxLayout()
     self.categories.append('all')
     for category in self.categories:
-      time_stamp = self.most_recent_stock_take[category].date
-      last_stock_take_label = QLabel(f"<b>Last stock take for {category.title()}: </b>" + time_stamp.strftime('%d-%m-%y, %H:%M:%S'))
+      stock_take = self.most_recent_stock_take.get(category)
+      time_stamp = stock_take.date.strftime('%d-%m-%y, %H:%M:%S') if stock_take else "None yet"
+      last_stock_take_label = QLabel(f"<b>Last stock take for {category.title()}: </b>" + time_stamp)
       # last_stock_take_label.setAlignment(Qt.AlignCenter)
       self.last_stock_take_layout.addWidget(last_stock_take_label)
     self.scroll_layout.addLayout(self.last_stock_take_layout)
@@ -7,7 +7,7 @@ from PyQt5.QtCore import Qt
 from datetime import datetime, timedelta
 import json
 from PyQt5.QtGui import QColor
-from database.products import fetch_products
+from utils.product_catalog import get_product_catalog
 from database.stock_takes import fetch_stock_takes_in_date_range, fetch_stock_takes_in_date_range_with_category
 
 
@@ -155,7 +155,7 @@ class StockTakeViewWindow(QMainWindow):
     def load_data(self, category):
         """Load stock take data into the table based on selected category."""
         self.category = category
-        products_results = fetch_products()
+        products_results = get_product_catalog().products()
 
         stock_take_results = self.process_stock_takes(fetch_stock_takes_in_date_range_with_category(category, self.start_date, self.end_date))
         previous_friday = self.end_date - timedelta(weeks=1)
@@ -5,17 +5,17 @@ from PyQt5.QtWidgets import (
     QWidget, QTableWidgetItem, QPushButton, QLabel, QTableWidget, QVBoxLayout,
     QMainWindow, QMessageBox, QHBoxLayout, QFileDialog
 )
-from database.products import fetch_products, update_product
+from database.products import update_product
+from utils.product_catalog import get_product_catalog
 from gui.components.reusable.animations.loading_component import LoadingManager
 from gui.components.reusable.table import DynamicTableWidget
 from gui.components.edit_product_windows.product_detail_window import ProductDetailWindow
 from datetime import datetime
-from resources.update_supplier_excel import process_file, save_output_file
 
 class EditProductWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, user=None):
         super().__init__()
-        self.setup_ui()
+        self.setup_ui(user)
 
     def setup_ui(self, user=None):
         self.products = []
@@ -67,7 +67,7 @@ class EditProductWindow(QMainWindow):
 
     def load_product_table(self):
         """Load product data into the table (Hardcoded Columns)."""
-        self.products = fetch_products()
+        self.products = get_product_catalog().products()
 
         if not self.products:
             self.label.setText("No data found.")
@@ -165,6 +165,9 @@ class EditProductWindow(QMainWindow):
         if not input_file:  # User cancelled file selection
             return
         
+        # pandas is only loaded once a supplier sheet is actually processed
+        from resources.update_supplier_excel import process_file
+
         self.loading_manager.run_with_loading(
             task_function=process_file,  # Direct call to your function
             on_complete=self.on_update_complete,
@@ -175,19 +178,11 @@ class EditProductWindow(QMainWindow):
             task_args=(input_file,)
         )
 
-    def on_update_complete(self, result, updated_at):
+    def on_update_complete(self, updated_df, updated_at, input_file=None):
         """
         Handle completion of the price update operation
         """
-        # Extract just the DataFrame from the tuple result
-        if isinstance(result, tuple) and len(result) == 2:
-            updated_df = result[0]  # Get just the DataFrame from the tuple
-            input_file = result[1]  # Get the original file path
-        else:
-            updated_df = result
-            input_file = None
-        
-        # Continue with the original function logic
+        # LoadingManager splits process_file's (DataFrame, input file) result
         if updated_df is not None and not updated_df.empty:
             # Get the base and extension from the original input file
             if input_file:
@@ -199,6 +194,13 @@ class EditProductWindow(QMainWindow):
                 
             default_output = f"{base}_updated{ext}"
             file_type = "Excel Files (*.xlsx)" if ext.lower() in ['.xlsx', '.xls'] else "CSV Files (*.csv)"
+
+            failed_codes = updated_df.attrs.get("failed_stock_codes") or []
+            if failed_codes:
+                QMessageBox.warning(
+                    self, "Some Prices Not Updated",
+                    f"{len(failed_codes)} stock codes could not be fetched from Sage and were left unchanged."
+                )
             
             output_file, _ = QFileDialog.getSaveFileName(
                 self, "Save Updated File", default_output, 
@@ -207,10 +209,11 @@ class EditProductWindow(QMainWindow):
 
             if output_file:
                 # Save to the selected location
+                from resources.update_supplier_excel import save_output_file
                 save_output_file(updated_df, output_file)
                 QMessageBox.information(self, "Success", f"File updated successfully and saved to:\n{output_file}")
         else:
-            self.status_label.setText("No invoices found for the selected date.")
+            QMessageBox.information(self, "No Data", "No rows were found in the selected sheet.")
 
     
     def on_update_error(self, error_message):
@@ -10,6 +10,7 @@ from auth.userAuthentication import AuthService
 from gui.components.user_accounts.loginComponent import LoginComponent  
 from gui.components.user_accounts.signUpComponent import SignUpComponent
 from gui.settings_window import SettingsWindow
+from resources import startup_timing
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -67,15 +68,16 @@ class MainWindow(QMainWindow):
         self.sign_up_component.back_button.clicked.connect(self.show_home)
         self.stacked_widget.addWidget(self.sign_up_component)
 
-        # Other windows
-        self.scheduled_tasks_window = ScheduledTasks()
-        self.stock_window = StockWindow()
-        self.edit_product_window = EditProductWindow()
-        self.settings_window = SettingsWindow()
-        self.stacked_widget.addWidget(self.scheduled_tasks_window)
-        self.stacked_widget.addWidget(self.stock_window)
-        self.stacked_widget.addWidget(self.edit_product_window)
-        self.stacked_widget.addWidget(self.settings_window)
+        # Other windows are built the first time they're opened (see get_page),
+        # so none of their database work happens before the login screen shows
+        self.logged_in_user = None
+        self.pages = {}
+        self.page_factories = {
+            "scheduled_tasks": lambda user: ScheduledTasks(),
+            "stock": lambda user: StockWindow(user),
+            "edit_product": lambda user: EditProductWindow(user),
+            "settings": lambda user: SettingsWindow(user),
+        }
 
         # Nav buttons
         self.nav_button_1 = QPushButton("Home", self)
@@ -154,6 +156,32 @@ class MainWindow(QMainWindow):
         self.update_auth_state()
         
 
+    def get_page(self, name):
+        """Return a sub-window, building it on first use."""
+        page = self.pages.get(name)
+        if page is None:
+            page = self.page_factories[name](self.logged_in_user)
+            self.stacked_widget.addWidget(page)
+            self.pages[name] = page
+            startup_timing.mark(f"Built {name} window")
+        return page
+
+    @property
+    def scheduled_tasks_window(self):
+        return self.get_page("scheduled_tasks")
+
+    @property
+    def stock_window(self):
+        return self.get_page("stock")
+
+    @property
+    def edit_product_window(self):
+        return self.get_page("edit_product")
+
+    @property
+    def settings_window(self):
+        return self.get_page("settings")
+
     def set_application_style(self):
         """Set global application style and colors"""
         # Create a palette with the desired background color
@@ -228,9 +256,11 @@ class MainWindow(QMainWindow):
 
     def on_login_successful(self, user_data):
         """Handle successful login"""
-        self.settings_window.setup_ui(user_data)
-        self.stock_window.setup_ui(user_data)
-        self.edit_product_window.setup_ui(user_data)
+        self.logged_in_user = user_data
+        # Pages that don't exist yet pick the user up when they're built
+        for name in ("settings", "stock", "edit_product"):
+            if name in self.pages:
+                self.pages[name].setup_ui(user_data)
         self.update_auth_state()
         self.show_home()
 
@@ -1,6 +1,6 @@
 from PyQt5.QtWidgets import QWidget, QLabel, QVBoxLayout, QTableWidget, QTableWidgetItem, QPushButton
 from models.product import Product
-from database.products import fetch_products
+from utils.product_catalog import get_product_catalog
 
 class ProductWindow(QWidget):
     rows = []
@@ -35,7 +35,7 @@ class ProductWindow(QWidget):
 
 
     def load_data(self):
-      self.rows = fetch_products()
+      self.rows = get_product_catalog().products()
       self.rows.sort(key=lambda product: product.name)         
 
       headers = ["Name", "Stock", "Stock Cost Per K/C/B £", "Total Cost £", "Stock Category", "Selling Price Per K/C/B £",  "Total Profit £"]
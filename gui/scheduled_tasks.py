@@ -45,15 +45,14 @@ class ScheduledTasks(QMainWindow):
         # Create stacked widget to switch between views
         self.stacked_widget = QStackedWidget()
         
-        # Create the Scheduled tasks components
+        # Create the Scheduled tasks components, the butchers list and reports
+        # query the database so they're only built when first opened
         self.dashboard_window = DashboardWindow()
-        self.butchers_list_window = ButchersListWindow()
-        self.report_window = ReportWindow()
+        self.butchers_list_window = None
+        self.report_window = None
         
         # Add windows to stacked widget
         self.stacked_widget.addWidget(self.dashboard_window)
-        self.stacked_widget.addWidget(self.butchers_list_window)
-        self.stacked_widget.addWidget(self.report_window)
         
         # Add components to the main layout
         main_layout.addLayout(self.nav_dashboard_layout)
@@ -64,6 +63,9 @@ class ScheduledTasks(QMainWindow):
     
     def show_butchers_list(self):
         """Switch to butchers list window"""
+        if self.butchers_list_window is None:
+            self.butchers_list_window = ButchersListWindow()
+            self.stacked_widget.addWidget(self.butchers_list_window)
         self.stacked_widget.setCurrentWidget(self.butchers_list_window)
         self.back_button.show()  # Show back button when viewing a subpage
         # Hide Dashboard navigation buttons when in a specific section
@@ -73,6 +75,9 @@ class ScheduledTasks(QMainWindow):
     def show_reports(self):
         """Switch to reports window"""
         self.back_button.show()  # Show back button when viewing a subpage
+        if self.report_window is None:
+            self.report_window = ReportWindow()
+            self.stacked_widget.addWidget(self.report_window)
         self.stacked_widget.setCurrentWidget(self.report_window)
         # Hide Dashboard navigation buttons when in a specific section
         self.butchers_list_button.hide()
@@ -11,9 +11,9 @@ from gui.components.setting_windows.user_approval_component import UserApprovalC
 
 class SettingsWindow(QMainWindow):
     """Main settings window with multiple components"""
-    def __init__(self):
+    def __init__(self, user=None):
         super().__init__()
-        self.setup_ui()
+        self.setup_ui(user)
         
     def setup_ui(self, user=None):
         # Set up the central widget layout
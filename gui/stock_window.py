@@ -53,17 +53,15 @@ class StockWindow(QMainWindow):
             # Create the stacked widget for different windows
             self.stacked_widget = QStackedWidget()
             
-            # Create the windows to be stacked
+            # Create the windows to be stacked, the rest query the database
+            # so they're only built when first opened (see get_window)
             self.dashboard_window = DashboardWindow()
-            self.stock_take_window = StockTakeWindow()
-            self.stock_sold_report_window = StockSoldReportWindow()
-            self.goods_in_window = GoodsInWindow()
+            self.stock_take_window = None
+            self.stock_sold_report_window = None
+            self.goods_in_window = None
             
             # Add windows to stacked widget
             self.stacked_widget.addWidget(self.dashboard_window)
-            self.stacked_widget.addWidget(self.stock_take_window)
-            self.stacked_widget.addWidget(self.goods_in_window)
-            self.stacked_widget.addWidget(self.stock_sold_report_window)
             
             # Add navigation layout and stacked widget to main layout
             main_layout.addLayout(self.nav_dashboard_layout)
@@ -76,6 +74,15 @@ class StockWindow(QMainWindow):
             message_label = QLabel("You do not have admin privileges to access this section.")
             main_layout.addWidget(message_label)
 
+    def get_window(self, attribute, window_class):
+        """Return the sub-window stored on attribute, building it on first use."""
+        window = getattr(self, attribute)
+        if window is None:
+            window = window_class()
+            self.stacked_widget.addWidget(window)
+            setattr(self, attribute, window)
+        return window
+
     def show_dashboard(self):
         """Switch back to Dashboard window"""
         self.stacked_widget.setCurrentWidget(self.dashboard_window)
@@ -87,7 +94,7 @@ class StockWindow(QMainWindow):
 
     def show_stock_sold_report(self):
         """Switch to Stock Sold Report window"""
-        self.stacked_widget.setCurrentWidget(self.stock_sold_report_window)
+        self.stacked_widget.setCurrentWidget(self.get_window('stock_sold_report_window', StockSoldReportWindow))
         self.back_button.show() 
         # Hide Dashboard navigation buttons
         self.stock_take_button.hide()
@@ -96,7 +103,7 @@ class StockWindow(QMainWindow):
 
     def show_stock_take(self):
         """Switch to Stock Take window"""
-        self.stacked_widget.setCurrentWidget(self.stock_take_window)
+        self.stacked_widget.setCurrentWidget(self.get_window('stock_take_window', StockTakeWindow))
         self.back_button.show() 
         # Hide Dashboard navigation buttons
         self.stock_take_button.hide()
@@ -104,7 +111,7 @@ class StockWindow(QMainWindow):
         self.stock_sold_button.hide()
 
     def show_goods_in(self):
-        self.stacked_widget.setCurrentWidget(self.goods_in_window)
+        self.stacked_widget.setCurrentWidget(self.get_window('goods_in_window', GoodsInWindow))
         self.back_button.show() 
         # Hide Dashboard navigation buttons
         self.stock_take_button.hide()
@@ -1,3 +1,6 @@
+# Start the startup clock before anything heavy is imported
+from resources import startup_timing
+
 # Import the environment loader before any other imports
 from env_loader import ensure_environment_variables
 
@@ -6,20 +9,35 @@ env_loaded = ensure_environment_variables()
 if not env_loaded:
     print("WARNING: Using fallback environment values!")
 
+startup_timing.mark("Environment loaded")
+
+# STARTUP_PROFILE_IMPORTS=1 writes per-module import times to startup_imports.txt
+if startup_timing.env_flag("STARTUP_PROFILE_IMPORTS"):
+    startup_timing.enable_import_profiling()
+
 import sys
+from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import QApplication
-from database.schemas.products_schema import insert_to_database
+from database.connection import close_pool
 from gui.main_window import MainWindow
+from gui.components.reusable.task_scheduler import get_task_scheduler
 from resources.degub_utils import check_env_variables
 from resources.update_release import update
 from PyQt5.QtWidgets import QMessageBox
 
+startup_timing.mark("Modules imported")
 
 
 def main():
     app = QApplication(sys.argv)
+    # Stop background tasks first, then release pooled database connections on exit
+    app.aboutToQuit.connect(get_task_scheduler().shutdown)
+    app.aboutToQuit.connect(close_pool)
     window = MainWindow()
+    startup_timing.mark("Main window built")
     window.show()
+    # Runs once the event loop has painted the window for the first time
+    QTimer.singleShot(0, startup_timing.first_paint)
     # update()
     sys.exit(app.exec_())
 
@@ -1,8 +1,50 @@
 from datetime import date, timedelta
-import openpyxl
-from openpyxl.styles import Font, Border, Side
+from itertools import chain, islice
 from PyQt5.QtWidgets import QFileDialog
-from openpyxl.worksheet.page import PageMargins
+
+# Rows looked at to size columns before a streamed sheet is written.
+# Write-only sheets need their column widths before the first row goes out.
+WIDTH_SAMPLE_ROWS = 1000
+MAX_COLUMN_WIDTH = 60
+
+TITLE_STYLE = "export_title"
+HEADER_STYLE = "export_header"
+BOXED_STYLE = "export_boxed"
+
+
+def add_export_styles(wb):
+    """Register the shared named styles once per workbook, instead of a Font per cell."""
+    from openpyxl.styles import Font, Border, Side, NamedStyle
+
+    title_style = NamedStyle(name=TITLE_STYLE)
+    title_style.font = Font(bold=True, size=20)
+
+    header_style = NamedStyle(name=HEADER_STYLE)
+    header_style.font = Font(bold=True, size=12)
+
+    thin = Side(border_style="thin", color='00000000')
+    boxed_style = NamedStyle(name=BOXED_STYLE)
+    boxed_style.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+
+    for style in (title_style, header_style, boxed_style):
+        wb.add_named_style(style)
+
+
+def measure_columns(rows, first_column_only=False):
+    """Longest value per column (1-based) over (kind, values, boxed) rows."""
+    widths = {}
+    for kind, values, boxed in rows:
+        if kind == "spacer":
+            continue
+        if not first_column_only and kind in ("title", "group"):
+            # Headings span the sheet, they shouldn't widen column A
+            continue
+        for col, value in enumerate(values[:1] if first_column_only else values, start=1):
+            length = len(str(value)) if value not in (None, "") else 0
+            if length > widths.get(col, 0):
+                widths[col] = length
+    return widths
+
 
 class ExcelExporter:
     def __init__(self, parent=None):
@@ -21,89 +63,19 @@ class ExcelExporter:
         """
         Export list-of-dict data to Excel.
 
-        :param data: List[Dict], input data
+        :param data: List[Dict] or any iterable of dicts, rows are streamed
+                     to the file unless they need grouping
         :param group_by: str | None, key to group by (e.g., 'customer_name')
         :param sheet_name: str, name of the Excel sheet
         :param filename: str | None, if None shows save dialog
         :param headers: List[str] | None, if None uses keys from first dict
         """
-        if not data or not isinstance(data, list):
+        items = iter(data or [])
+        first_item = next(items, None)
+        if not isinstance(first_item, dict):
             raise ValueError("Data must be a non-empty list of dictionaries.")
-
-        
-
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = sheet_name
-        row = 1
-        title_font = Font(
-            bold=True,
-            size=20
-        )
-        bold_font = Font(
-            bold=True,
-            size=12
-        )
-        border = Border(
-            left=Side(border_style="thin",
-                color='00000000'),
-            right=Side(border_style="thin",
-                color='00000000'),
-            top=Side(border_style="thin",
-                color='00000000'),
-            bottom=Side(border_style="thin",
-                color='00000000')
-        )
-
-
-
-        if title:
-            ws.cell(row=1, column=1, value=title).font = title_font
-            row += 1
-
-        if group_by:
-            grouped = {}
-            keys = headers or list(items[0].keys())
-
-            for col, key in enumerate(keys, start=1):
-                ws.cell(row=row, column=col, value=key).font = bold_font
-            if butchers_list:
-                ws.cell(row=row, column=(len(keys) + 1), value="Weight").font = bold_font
-                ws.cell(row=row, column=(len(keys) + 2), value="Code").font = bold_font
-            row += 1
-
-            for item in data:
-                key = item.get(group_by, "Ungrouped")
-                grouped.setdefault(key, []).append(item)
-
-
-
-            for group, items in grouped.items():
-                ws.cell(row=row, column=1, value=f"{group_by.capitalize()}: {group}").font = bold_font
-                row += 1
-
-
-                for item in items:
-                    for col, key in enumerate(keys, start=1):
-                        ws.cell(row=row, column=col, value=item.get(key.lower(), ""))
-                    if butchers_list:
-                        ws.cell(row=row, column=(len(keys) + 1), value="").border = border
-                        ws.cell(row=row, column=(len(keys) + 2), value="").border = border
-                    row += 1
-                
-                ws.row_dimensions[row].height = 4
-                row += 1  # spacer between groups
-                
-        else:
-            keys = headers or list(data[0].keys())
-            for col, key in enumerate(keys, start=1):
-                ws.cell(row=row, column=col, value=key).font = bold_font
-            row += 1
-
-            for item in data:
-                for col, key in enumerate(keys, start=1):
-                    ws.cell(row=row, column=col, value=item.get(key, ""))
-                row += 1
+        items = chain([first_item], items)
+        keys = headers or list(first_item.keys())
 
         if not filename:
             filename, _ = QFileDialog.getSaveFileName(
@@ -114,16 +86,82 @@ class ExcelExporter:
             if not filename.endswith(".xlsx"):
                 filename += ".xlsx"
 
+        rows = []
+        if title:
+            rows.append(("title", [title], 0))
+
+        if group_by:
+            # Grouping needs every row up front, so this sheet is sized exactly
+            rows.extend(self.grouped_rows(items, keys, group_by, butchers_list))
+            sample_size = None
+        else:
+            rows = chain(rows, self.plain_rows(items, keys))
+            sample_size = WIDTH_SAMPLE_ROWS
+
+        self.write_rows(
+            filename,
+            rows,
+            sheet_name=sheet_name,
+            sample_size=sample_size,
+            butchers_list=butchers_list
+        )
+
+    def plain_rows(self, items, keys):
+        yield ("header", list(keys), 0)
+        for item in items:
+            yield ("data", [item.get(key, "") for key in keys], 0)
+
+    def grouped_rows(self, items, keys, group_by, butchers_list=None):
+        header = list(keys)
+        if butchers_list:
+            header += ["Weight", "Code"]
+        yield ("header", header, 0)
+
+        grouped = {}
+        for item in items:
+            grouped.setdefault(item.get(group_by, "Ungrouped"), []).append(item)
+
+        for group, group_items in grouped.items():
+            yield ("group", [f"{group_by.capitalize()}: {group}"], 0)
+            for item in group_items:
+                values = [item.get(key.lower(), "") for key in keys]
+                if butchers_list:
+                    # Empty boxes for the butchers to write the weight and code in
+                    yield ("data", values + ["", ""], 2)
+                else:
+                    yield ("data", values, 0)
+            yield ("spacer", [], 0)  # spacer between groups
+
+    def write_rows(self, filename, rows, sheet_name="Sheet1", sample_size=WIDTH_SAMPLE_ROWS, butchers_list=None):
+        """
+        Stream (kind, values, boxed) rows into a write-only workbook.
+
+        kind is "title", "header", "group", "data" or "spacer", and boxed is
+        how many trailing cells get a border. Only the first sample_size rows
+        (all of them if None) are held in memory, to size the columns.
+        """
+        import openpyxl
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.utils import get_column_letter
+        from openpyxl.worksheet.page import PageMargins
+
+        wb = openpyxl.Workbook(write_only=True)
+        add_export_styles(wb)
+        ws = wb.create_sheet(title=sheet_name)
+
+        rows = iter(rows)
+        sample = list(rows) if sample_size is None else list(islice(rows, sample_size))
+
+        if butchers_list:
+            # Only the product column is sized, the rest keep their print layout
+            widths = measure_columns(sample, first_column_only=True)
+        else:
+            widths = {col: width + 2 for col, width in measure_columns(sample).items()}
+        for col, width in widths.items():
+            if width:
+                ws.column_dimensions[get_column_letter(col)].width = min(width, MAX_COLUMN_WIDTH)
 
         if butchers_list:
-            # Get only the first column's cells
-            first_column_cells = list(ws.columns)[0]
-                
-            # Calculate the maximum length in the first column
-            length = max(len(str(cell.value)) if cell.value else 0 for cell in first_column_cells)
-                
-            # Set the width of just the first column
-            ws.column_dimensions[first_column_cells[0].column_letter].width = length
             ws.page_margins = PageMargins(
                 left=0.23622,
                 right=0.23622,
@@ -133,5 +171,24 @@ class ExcelExporter:
                 footer=0.3
             )
 
+        def styled(value, style):
+            cell = WriteOnlyCell(ws, value=value)
+            cell.style = style
+            return cell
+
+        for row_idx, (kind, values, boxed) in enumerate(chain(sample, rows), start=1):
+            if kind == "title":
+                ws.append([styled(values[0], TITLE_STYLE)])
+            elif kind == "header":
+                ws.append([styled(value, HEADER_STYLE) for value in values])
+            elif kind == "group":
+                ws.append([styled(values[0], HEADER_STYLE)])
+            elif kind == "spacer":
+                ws.row_dimensions[row_idx].height = 4
+                ws.append([])
+            elif boxed:
+                ws.append(values[:-boxed] + [styled(value, BOXED_STYLE) for value in values[-boxed:]])
+            else:
+                ws.append(values)
 
         wb.save(filename)
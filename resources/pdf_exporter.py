@@ -1,7 +1,33 @@
-from PyQt5.QtPrintSupport import QPrinter
-from PyQt5.QtWidgets import QFileDialog, QApplication
-from PyQt5.QtWebEngineWidgets import QWebEngineView
+import os
 from datetime import datetime, timedelta
+from PyQt5.QtCore import Qt, QRectF, QMarginsF
+from PyQt5.QtGui import (
+    QGuiApplication, QPdfWriter, QPainter, QPageLayout, QPageSize, QFont, QColor, QPen
+)
+from PyQt5.QtWidgets import QFileDialog
+
+STOCK_CATEGORIES = ['fresh', 'dry', 'frozen']
+
+# Sheets are drawn in device pixels at this resolution
+PDF_RESOLUTION = 300
+PAGE_MARGIN_MM = 5
+
+# Rows shrink to fit the sheet on one page, but never below the minimum
+MIN_ROW_HEIGHT_MM = 4.5
+MAX_ROW_HEIGHT_MM = 9
+TITLE_HEIGHT_MM = 8
+HEADER_HEIGHT_MM = 6
+CELL_PADDING_MM = 1
+
+# Product column is wider than the five day columns, on each half of the sheet
+COLUMN_WEIGHTS = [30, 14, 14, 14, 14, 14]
+
+HEADER_COLOUR = "#dddddd"
+CATEGORY_COLOUR = "#bbbbbb"
+
+# Keeps the application alive for headless batch runs
+_headless_app = None
+
 
 def get_week_dates():
     """Returns the Monday to Friday dates for the current week."""
@@ -9,186 +35,193 @@ def get_week_dates():
     monday = today - timedelta(days=today.weekday())  # Get Monday of the current week
     return [(monday + timedelta(days=i)).strftime('%d-%m-%Y') for i in range(5)]
 
-def export_to_pdf(parent, data):
-    """Generate a PDF with one large table split into two parts (left & right columns)."""
-    
-    # Get Monday–Friday dates dynamically
-    week_dates = get_week_dates()
-    
-    # Group products by category
+
+def build_sheet_rows(data):
+    """
+    Lay {stock_category: [Product]} out as the two halves of the sheet.
+
+    Returns (left, right) pairs, each side being ("category", name),
+    ("product", name) or None for padding.
+    """
     categories = {}
-    for category, product_list in data.items():
+    for product_list in data.values():
         for product in product_list:
-            if product.product_category not in categories:
-                categories[product.product_category] = []
-            categories[product.product_category].append(product)
-
-    # ✅ **Ensure HTML content is properly formatted**
-    html_content = f"""
-    <html>
-    <head>
-        <style>
-            @page {{
-                size: A4 landscape;
-                margin: 5mm; /* Minimize margins to maximize space */
-            }}
-            body {{
-                font-family: Arial, sans-serif;
-                font-size: 8px; /* Reduce font size slightly */
-                margin: 0;
-                padding: 0;
-                width: 100%;
-                height: 100%;
-                overflow: hidden;
-            }}
-            h1 {{
-                text-align: center;
-                font-size: 14px;
-                margin-bottom: 5px;
-            }}
-            .table-container {{
-                width: 100%;
-                height: 100%;
-                display: flex;
-                justify-content: center;
-            }}
-            table {{
-                width: 100%;
-                height: 100%;
-                border-collapse: collapse;
-                margin-bottom: 5px;
-                table-layout: fixed; /* Ensure even column widths */
-                page-break-inside: avoid;
-            }}
-            th, td {{
-                border: 1px solid #000;
-                padding: 3px;
-                text-align: center;
-                word-wrap: break-word;
-                overflow: hidden;
-                height: auto; /* Allow dynamic height expansion */
-                min-height: 15px;
-            }}
-            th {{
-                background-color: #ddd;
-                font-size: 10px;
-            }}
-            td {{
-                font-size: 8px;
-                height: auto; /* Allow dynamic height expansion */
-                min-height: 15px;
-            }}
-            tr {{
-                height: auto; /* Allow rows to stretch */
-            }}
-            .category-header {{
-                background-color: #bbb;
-                font-weight: bold;
-                text-align: left;
-                padding-left: 5px;
-            }}
-        </style>
-    </head>
-    <body>
-        <h1>Stock Take - Week of {week_dates[0]}</h1>
-        <div class="table-container">
-            <table>
-                <colgroup>
-                    <col style="width: 30%;">  <!-- Product column is larger -->
-                    <col style="width: 14%;">
-                    <col style="width: 14%;">
-                    <col style="width: 14%;">
-                    <col style="width: 14%;">
-                    <col style="width: 14%;">
-                    <col style="width: 30%;">  <!-- Product column is larger -->
-                    <col style="width: 14%;">
-                    <col style="width: 14%;">
-                    <col style="width: 14%;">
-                    <col style="width: 14%;">
-                    <col style="width: 14%;">
-                </colgroup>
-            
-                <tr>
-                    <th>Product</th> {"".join(f"<th>{date}</th>" for date in week_dates[:5])}  
-                    <th>Product</th> {"".join(f"<th>{date}</th>" for date in week_dates[:5])}
-                </tr>
-    """
+            categories.setdefault(product.product_category, []).append(product)
 
-    # Convert categories into a flat product list and split into two parts
-    all_products = []
+    entries = []
     for category, products in categories.items():
-        all_products.append({"category": category, "is_category": True})  # Category header row
-        all_products.extend(products)
-
-    mid_index = len(all_products) // 2
-    left_products = all_products[:mid_index]
-    right_products = all_products[mid_index:]
-
-    # **Ensure both sides have the same row count by padding**
-    max_rows = max(len(left_products), len(right_products))
-    left_products.extend([""] * (max_rows - len(left_products)))
-    right_products.extend([""] * (max_rows - len(right_products)))
-
-    # ✅ **Generate table rows**
-    for left, right in zip(left_products, right_products):
-        html_content += "<tr>"
-
-        # Left Column
-        if isinstance(left, dict) and left.get("is_category"):
-            html_content += f"<td class='category-header' colspan='6'>{left['category']}</td>"
-        elif left:
-            html_content += f"<td>{left.name}</td>" + "".join("<td></td>" for _ in range(5))
+        entries.append(("category", category))
+        entries.extend(("product", product.name) for product in products)
+
+    mid_index = len(entries) // 2
+    left = entries[:mid_index]
+    right = entries[mid_index:]
+
+    # Both halves get the same number of rows
+    max_rows = max(len(left), len(right))
+    left.extend([None] * (max_rows - len(left)))
+    right.extend([None] * (max_rows - len(right)))
+    return list(zip(left, right))
+
+
+def ensure_gui_application():
+    """QPainter needs a Qt application for fonts, batch runs may not have one yet."""
+    global _headless_app
+    app = QGuiApplication.instance()
+    if app is None:
+        _headless_app = app = QGuiApplication(["pdf_exporter", "-platform", "offscreen"])
+    return app
+
+
+def draw_stock_take_sheet(painter, page_rect, rows, week_dates, title, new_page):
+    """Draw the sheet onto painter, calling new_page() whenever it runs over a page."""
+    mm = PDF_RESOLUTION / 25.4
+    title_height = TITLE_HEIGHT_MM * mm
+    header_height = HEADER_HEIGHT_MM * mm
+    padding = CELL_PADDING_MM * mm
+
+    available = page_rect.height() - title_height - header_height
+    row_height = available / max(len(rows), 1)
+    row_height = min(max(row_height, MIN_ROW_HEIGHT_MM * mm), MAX_ROW_HEIGHT_MM * mm)
+    rows_per_page = max(1, int(available // row_height))
+
+    half_width = page_rect.width() / 2
+    total_weight = sum(COLUMN_WEIGHTS)
+    column_widths = [half_width * weight / total_weight for weight in COLUMN_WEIGHTS]
+
+    title_font = QFont("Arial", 12, QFont.Bold)
+    header_font = QFont("Arial", 8, QFont.Bold)
+    cell_font = QFont("Arial", 7)
+    category_font = QFont("Arial", 7, QFont.Bold)
+
+    painter.setPen(QPen(Qt.black, max(1, int(0.2 * mm))))
+
+    def draw_cell(rect, text="", font=cell_font, fill=None, align=Qt.AlignCenter):
+        if fill:
+            painter.fillRect(rect, QColor(fill))
+        painter.drawRect(rect)
+        if text:
+            painter.setFont(font)
+            text_rect = rect.adjusted(padding, 0, -padding, 0)
+            text = painter.fontMetrics().elidedText(str(text), Qt.ElideRight, int(text_rect.width()))
+            painter.drawText(text_rect, align | Qt.AlignVCenter, text)
+
+    def draw_half(x, y, height, entry):
+        if entry is None:
+            draw_cell(QRectF(x, y, half_width, height))
+        elif entry[0] == "category":
+            draw_cell(QRectF(x, y, half_width, height), entry[1], category_font, CATEGORY_COLOUR, Qt.AlignLeft)
         else:
-            html_content += "<td colspan='6'></td>"
-
-        # Right Column
-        if isinstance(right, dict) and right.get("is_category"):
-            html_content += f"<td class='category-header' colspan='6'>{right['category']}</td>"
-        elif right:
-            html_content += f"<td>{right.name}</td>" + "".join("<td></td>" for _ in range(5))
-        else:
-            html_content += "<td colspan='6'></td>"
-
-        html_content += "</tr>"
+            draw_cell(QRectF(x, y, column_widths[0], height), entry[1])
+            cell_x = x + column_widths[0]
+            for width in column_widths[1:]:
+                draw_cell(QRectF(cell_x, y, width, height))
+                cell_x += width
+
+    left_x = page_rect.left()
+    right_x = left_x + half_width
+
+    for page_index, start in enumerate(range(0, max(len(rows), 1), rows_per_page)):
+        if page_index:
+            new_page()
+
+        y = page_rect.top()
+        painter.setFont(title_font)
+        page_title = title if page_index == 0 else f"{title} (continued)"
+        painter.drawText(QRectF(left_x, y, page_rect.width(), title_height), Qt.AlignCenter, page_title)
+        y += title_height
+
+        for x in (left_x, right_x):
+            cell_x = x
+            for width, text in zip(column_widths, ["Product"] + list(week_dates[:5])):
+                draw_cell(QRectF(cell_x, y, width, header_height), text, header_font, HEADER_COLOUR)
+                cell_x += width
+        y += header_height
+
+        for left, right in rows[start:start + rows_per_page]:
+            draw_half(left_x, y, row_height, left)
+            draw_half(right_x, y, row_height, right)
+            y += row_height
+
+
+def write_stock_take_pdf(file_name, data, title=None, week_dates=None):
+    """Render the weekly stock take sheet for {stock_category: [Product]} to file_name."""
+    ensure_gui_application()
+    week_dates = week_dates or get_week_dates()
+    title = title or f"Stock Take - Week of {week_dates[0]}"
+
+    writer = QPdfWriter(file_name)
+    writer.setResolution(PDF_RESOLUTION)
+    writer.setTitle(title)
+    writer.setPageLayout(QPageLayout(
+        QPageSize(QPageSize.A4),
+        QPageLayout.Landscape,
+        QMarginsF(PAGE_MARGIN_MM, PAGE_MARGIN_MM, PAGE_MARGIN_MM, PAGE_MARGIN_MM),
+        QPageLayout.Millimeter
+    ))
+
+    painter = QPainter()
+    if not painter.begin(writer):
+        print(f"❌ Failed to open {file_name} for writing.")
+        return False
+    try:
+        page_rect = QRectF(0, 0, writer.width(), writer.height())
+        draw_stock_take_sheet(painter, page_rect, build_sheet_rows(data), week_dates, title, writer.newPage)
+    finally:
+        painter.end()
+    return True
+
+
+def export_stock_take_sheets(output_dir, sheets=None, week_dates=None):
+    """
+    Write one sheet per stock category without any dialogs.
 
-    html_content += """
-            </table>
-        </div>
-    </body>
-    </html>
+    sheets is {stock_category: [Product]}, defaulting to the fresh, dry and
+    frozen products from the catalogue. Returns the files written.
     """
+    if sheets is None:
+        from utils.product_catalog import get_product_catalog
+        catalog = get_product_catalog()
+        sheets = {category: catalog.by_stock_category(category) for category in STOCK_CATEGORIES}
+
+    week_dates = week_dates or get_week_dates()
+    os.makedirs(output_dir, exist_ok=True)
+
+    written = []
+    for category, products in sheets.items():
+        if not products:
+            print(f"No {category} products, skipping its stock take sheet.")
+            continue
+        file_name = os.path.join(output_dir, f"stock_take_{category}_{week_dates[0]}.pdf")
+        title = f"{category.title()} Stock Take - Week of {week_dates[0]}"
+        if write_stock_take_pdf(file_name, {category: products}, title, week_dates):
+            written.append(file_name)
+    return written
+
 
-    # ✅ **Check if the user selected a file name**
+def export_to_pdf(parent, data):
+    """Ask where to save, then write the two-column stock take sheet for data."""
     file_name, _ = QFileDialog.getSaveFileName(parent, "Save PDF", "", "PDF Files (*.pdf)")
     if not file_name:
         return
+    if not file_name.lower().endswith(".pdf"):
+        file_name += ".pdf"
 
-    viewer = QWebEngineView()
-    printer = QPrinter(QPrinter.HighResolution)
-    printer.setOutputFormat(QPrinter.PdfFormat)
-    printer.setOrientation(QPrinter.Landscape)  # Ensure landscape mode
-    printer.setOutputFileName(file_name)
-    printer.setPageSize(QPrinter.A4)
-    printer.setPageMargins(2, 2, 2, 2, QPrinter.Millimeter)  # Tighten margins to prevent spillover
-
-    def on_load_finished(success):
-        if not success:
-            print("Failed to load HTML content.")
-            return
-        viewer.page().print(printer, on_print_done)
-
-    def on_print_done(result):
-        if result:
-            print(f"✅ PDF saved successfully: {file_name}")
-        else:
-            print("❌ Failed to save PDF.")
-        viewer.deleteLater()
+    week_dates = get_week_dates()
+    title = None
+    if len(data) == 1:
+        title = f"{str(next(iter(data))).title()} Stock Take - Week of {week_dates[0]}"
 
-    viewer.setHtml(html_content)
-    viewer.loadFinished.connect(on_load_finished)
+    if write_stock_take_pdf(file_name, data, title, week_dates):
+        print(f"✅ PDF saved successfully: {file_name}")
 
-    if QApplication.instance() is None:
-        app = QApplication([])
-        app.exec_()
 
+if __name__ == "__main__":
+    # python -m resources.pdf_exporter [output_dir]
+    import sys
+    from env_loader import ensure_environment_variables
 
+    ensure_environment_variables()
+    output_dir = sys.argv[1] if len(sys.argv) > 1 else "."
+    for file_name in export_stock_take_sheets(output_dir):
+        print(f"✅ PDF saved successfully: {file_name}")
@@ -0,0 +1,108 @@
+import builtins
+import os
+import sys
+import time
+
+# Measured from the moment main.py imports this module
+STARTUP_TIME = time.perf_counter()
+
+_marks = []
+
+# Import profiling (STARTUP_PROFILE_IMPORTS=1)
+_original_import = None
+_import_stack = []
+_import_times = {}
+
+
+def mark(label):
+    """Record how long after startup a step finished."""
+    _marks.append((label, time.perf_counter() - STARTUP_TIME))
+
+
+def format_report():
+    lines = ["Startup timing (seconds since launch):"]
+    previous = 0.0
+    for label, elapsed in _marks:
+        lines.append(f"  {elapsed:8.3f}  (+{elapsed - previous:.3f})  {label}")
+        previous = elapsed
+    return "\n".join(lines)
+
+
+def report():
+    """Print the timings when STARTUP_TIMING=1."""
+    # Read when reporting, .env is only loaded after this module is imported
+    if env_flag("STARTUP_TIMING"):
+        print(format_report())
+
+
+def env_flag(name):
+    return (os.getenv(name) or os.environ.get(name) or "0") == "1"
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    # Already imported modules cost nothing worth reporting
+    if level == 0 and name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    start = time.perf_counter()
+    _import_stack.append(0.0)
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - start
+        nested = _import_stack.pop()
+        if _import_stack:
+            _import_stack[-1] += elapsed
+
+        if level:
+            package = (globals or {}).get("__package__") or ""
+            name = f"{package}:{'.' * level}{name}"
+        total, self_time = _import_times.get(name, (0.0, 0.0))
+        _import_times[name] = (total + elapsed, self_time + elapsed - nested)
+
+
+def enable_import_profiling():
+    """Time every import from here until first paint."""
+    global _original_import
+    if _original_import is None:
+        _original_import = builtins.__import__
+        builtins.__import__ = _timed_import
+
+
+def disable_import_profiling():
+    global _original_import
+    if _original_import is not None:
+        builtins.__import__ = _original_import
+        _original_import = None
+
+
+def format_import_report(limit=60):
+    lines = [
+        "Startup imports, slowest first (seconds):",
+        f"  {'total':>8}  {'self':>8}  module"
+    ]
+    ranked = sorted(_import_times.items(), key=lambda entry: entry[1][0], reverse=True)
+    for name, (total, self_time) in ranked[:limit]:
+        lines.append(f"  {total:8.3f}  {self_time:8.3f}  {name}")
+    return "\n".join(lines)
+
+
+def write_import_report():
+    """Write the import timings next to the app (or to STARTUP_IMPORT_REPORT)."""
+    path = os.getenv("STARTUP_IMPORT_REPORT") or os.environ.get("STARTUP_IMPORT_REPORT") or "startup_imports.txt"
+    try:
+        with open(path, "w", encoding="utf-8") as report_file:
+            report_file.write(format_report() + "\n\n" + format_import_report() + "\n")
+        print(f"Startup import report written to {os.path.abspath(path)}")
+    except OSError as e:
+        print(f"Could not write startup import report: {e}")
+
+
+def first_paint():
+    """Queue with QTimer.singleShot(0, ...) right after window.show()."""
+    mark("First paint")
+    report()
+    if _original_import is not None:
+        disable_import_profiling()
+        write_import_report()
+
@@ -1,82 +1,89 @@
 import pandas as pd
 import os
-from PyQt5.QtWidgets import QFileDialog, QMessageBox
-from controllers.sage_controllers.products import get_product_by_code, get_products_by_codes
+from controllers.sage_controllers.products import get_products_by_codes
 
-def fetch_products_from_sage(stock_codes):
+def fetch_products_from_sage(stock_codes, progress_callback=None, failed=None):
     """
     Fetches price from Sage API.
     """
     # print(f"Fetching price for stock code: {stock_code}")
-    products = get_products_by_codes(stock_codes)
+    products = get_products_by_codes(stock_codes, on_progress=progress_callback, failed=failed)
     if products:
         return products
     return None
 
+# Customer price list columns that all take the Sage sales price
+PRICE_COLUMNS = ["106183:Balfour Group Price List", "103746:Hand Picked Hotels", "51427:Best Western Dover Marina"]
+
 def update_prices(df, progress_callback=None):
     """
-    Process each row of the dataframe and update prices from Sage
+    Fetch the sheet's stock codes from Sage and update its prices
     """
-    rows_updated = 0
-    rows_skipped = 0
-    total_rows = len(df)
-    
     codes = get_sage_codes(df)
-    products = fetch_products_from_sage(codes)
+    failed = []
+    products = fetch_products_from_sage(codes, progress_callback, failed)
 
+    # Codes in chunks Sage never answered are left alone rather than flagged NIS
+    failed_codes = [code for chunk, _ in failed for code in chunk]
+    df = apply_prices(df, products, failed_codes)
+    df.attrs["failed_stock_codes"] = failed_codes
+    return df
 
-    for index, row in df.iterrows():
-        # Look for Stock Code column - try different possible column names
-        stock_code = None
-        # print(row)
-        
-        stock_code = row["Stock Code"]
-  
-        
-        # Skip empty stock codes
-        if stock_code is None or pd.isna(stock_code) or stock_code == "":
-            rows_skipped += 1
-            continue
-            
-        try:
-            # Get prices from Sage
-            price = get_price_from_products(stock_code, products)
-            if price:
-                # Update the price columns if they exist
-                price_columns = ["106183:Balfour Group Price List", "103746:Hand Picked Hotels", "51427:Best Western Dover Marina"]
-                for col in price_columns:
-                    if col in df.columns:
-                        df.at[index, col] = price
-                
-                rows_updated += 1
-            else:
-                rows_skipped += 1
-                
-                
-        except Exception as e:
-            # print(f"Error updating price for {stock_code}: {str(e)}")
-            df.at[index, "Comments"] = 'NIS'
-            rows_skipped += 1
-    
+def apply_prices(df, products, failed_codes=()):
+    """
+    Write Sage prices onto every price column in one pass.
+    Rows with a stock code that Sage has no price for get 'NIS' in Comments,
+    except codes in failed_codes, which couldn't be looked up at all.
+    """
+    stock_codes = df["Stock Code"]
+    has_code = stock_codes.notna() & (stock_codes != "")
+
+    prices = stock_codes.map(build_price_index(products))
+    has_price = has_code & prices.notna()
+
+    for col in PRICE_COLUMNS:
+        if col in df.columns:
+            # Prices are written as "12.50" strings, so numeric columns become object first
+            if df[col].dtype != object:
+                df[col] = df[col].astype(object)
+            df.loc[has_price, col] = prices[has_price]
+
+    not_in_sage = has_code & ~has_price & ~stock_codes.isin(list(failed_codes))
+    if not_in_sage.any():
+        df.loc[not_in_sage, "Comments"] = 'NIS'
+
+    rows_updated = int(has_price.sum())
+    rows_skipped = len(df) - rows_updated
     print(f"Update complete! Updated {rows_updated} products, skipped {rows_skipped} products.")
+    if failed_codes:
+        print(f"{len(failed_codes)} stock codes could not be fetched from Sage and were left unchanged.")
     return df
 
 def get_sage_codes(df):
-    codes = []
-    
-    for index, row in df.iterrows():
-        # Look for Stock Code column - try different possible column names
-        stock_code = None
-        # print(row)
-        
-        stock_code = row["Stock Code"]
-        codes.append(stock_code)
-    return codes
+    """
+    Unique, non-empty stock codes on the sheet, in the order they appear
+    """
+    codes = df["Stock Code"].dropna()
+    codes = codes[codes != ""]
+    return codes.drop_duplicates().tolist()
+
+def build_price_index(products):
+    """
+    Sage products as a stock code -> "0.00" price Series.
+    The first product listed for a code wins, and codes without a usable price are left out.
+    """
+    if not products:
+        return pd.Series(dtype=object)
 
-def get_price_from_products(stock_code, products):
-    res = next((sub for sub in products if sub['stockCode'] == stock_code), None)
-    price = f"{float(res['salesPrice']):.2f}"
-    return price
+    frame = pd.DataFrame.from_records(products, columns=["stockCode", "salesPrice"])
+    frame = frame.drop_duplicates("stockCode", keep="first")
+    sales_prices = pd.to_numeric(frame["salesPrice"], errors="coerce")
+    frame = frame[sales_prices.notna()]
+    return pd.Series(
+        sales_prices[sales_prices.notna()].map("{:.2f}".format).values,
+        index=frame["stockCode"].values,
+        dtype=object
+    )
 
 def get_file_extension(file_path):
     """
@@ -124,10 +131,11 @@ def save_output_file(df, file_path):
     
     print(f"File saved successfully to {file_path}")
 
-def process_file(input_file):
+def process_file(input_file, on_pause=None, on_progress=None):
     """
     Main function to process the Excel or CSV file.
     Returns the updated dataframe for saving.
+    on_progress(done, total) is called as each chunk of Sage products arrives.
     """
     try:
         # Read file (Excel or CSV)
@@ -135,7 +143,7 @@ def process_file(input_file):
         print(f"Found {len(df)} rows in the file")
         
         # Update prices
-        updated_df = update_prices(df)
+        updated_df = update_prices(df, on_progress)
         
         # Return both the dataframe and the original input file path
         return updated_df, input_file
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import time
+import unittest
+from datetime import date, timedelta
+from unittest import mock
+
+from controllers.sage_controllers import sage_client as sage_client_module
+from controllers.sage_controllers.invoice_products import iter_invoice_items_id
+from controllers.sage_controllers.sage_client import SageClient
+
+
+class HistoricalInvoiceItemsCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+        environment = mock.patch.dict(os.environ, {
+            "SAGE_CACHE_ENABLED": "1",
+            "SAGE_CACHE_PATH": os.path.join(self.temp_dir.name, "sage_cache.sqlite3"),
+        })
+        environment.start()
+        self.addCleanup(environment.stop)
+
+        self.client = SageClient(api_token="token", external_url="https://sage.test", page_size=0)
+        # Skip the network probe
+        self.client._route = ("https://sage.test", True)
+        self.client._route_resolved_at = time.monotonic()
+
+        shared_client = mock.patch.object(sage_client_module, "_sage_client", self.client)
+        shared_client.start()
+        self.addCleanup(shared_client.stop)
+
+        response = mock.Mock()
+        response.json.return_value = {"results": [{"invoiceNumber": 1, "stockCode": "A1", "quantity": 2}]}
+        self.http = mock.patch.object(self.client.session, "request", return_value=response).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def fetch(self, invoices_date):
+        return list(iter_invoice_items_id([1], invoices_date=invoices_date))
+
+    def test_historical_item_search_is_served_from_cache(self):
+        last_week = (date.today() - timedelta(weeks=1)).strftime("%Y-%m-%d")
+        first_run = self.fetch(last_week)
+        self.assertEqual(self.http.call_count, 1)
+
+        # Well past the default TTL, the items of last week's invoices are still cached
+        with mock.patch("controllers.sage_controllers.response_cache.time.time", return_value=time.time() + 86400):
+            second_run = self.fetch(last_week)
+
+        self.assertEqual(second_run, first_run)
+        self.assertEqual(self.http.call_count, 1)
+
+    def test_todays_item_search_expires(self):
+        today = date.today().strftime("%Y-%m-%d")
+        self.fetch(today)
+
+        with mock.patch("controllers.sage_controllers.response_cache.time.time", return_value=time.time() + 86400):
+            self.fetch(today)
+
+        self.assertEqual(self.http.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
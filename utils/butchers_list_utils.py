@@ -2,51 +2,63 @@ from itertools import chain
 from collections import defaultdict
 import json
 
-from controllers.sage_controllers.invoice_products import get_invoice_items_id
+from controllers.sage_controllers.invoice_products import iter_invoice_items_id
 from controllers.sage_controllers.invoices import get_todays_invoices, get_todays_new_invoices, refresh_get_todays_invoices
 from database.butchers_lists import fetch_all_butchers_lists_by_date, fetch_butchers_list_by_date
-from database.products import fetch_products_stock_code_fresh, fetch_single_product_stock_code, insert_product
+from database.products import fetch_all_product_sage_codes, insert_product
+from utils.sage_code_utils import FreshCodeIndex, parse_sage_codes
+from utils.task_context import TaskContext
 
-def get_invoice_products(date, on_pause=None):
+def get_invoice_products(date, on_pause=None, context=None):
     """
     Main function to retrieve and process invoice products for a specific date.
     Creates a new butchers list row in the database instead of updating a JSON blob.
     """
+    context = context or TaskContext()
     invoices_ids = []
     
     invoice_list = []
-    fresh_products_codes = fetch_products_stock_code_fresh()
+    context.set_stage("Loading fresh products")
+    fresh_products_codes = FreshCodeIndex.from_database()
     existing_butchers_list = fetch_butchers_list_by_date(date)
     processed_data = []
     
     # Get appropriate invoices based on whether we have an existing list
+    context.check_cancelled()
+    context.set_stage("Fetching invoices")
     if existing_butchers_list:
         previous_fetch = existing_butchers_list.updated_at.strftime("%Y-%m-%d %H:%M:%S")
         invoice_list = get_todays_new_invoices(date, previous_fetch)
     else:
         invoice_list = get_todays_invoices(date)
+    context.check_cancelled()
     
     if invoice_list and 'results' in invoice_list and invoice_list['results']:
         for invoice in invoice_list['results']:
             if 'invoiceNumber' in invoice:
                 invoices_ids.append(invoice['invoiceNumber'])
         
-        # Process invoices and create new butchers list
-        invoice_items = get_invoice_items_id(invoices_ids)
+        # Stream the invoice items straight into processing, page by page
+        context.set_stage("Fetching invoice items")
+        invoice_items = iter_invoice_items_id(
+            invoices_ids, on_progress=context.progress_callback("Fetching invoice items"), invoices_date=date
+        )
 
-        processed_data = process_invoices_products(invoice_items, fresh_products_codes, invoice_list['results'], on_pause)
+        processed_data = process_invoices_products(invoice_items, fresh_products_codes, invoice_list['results'], on_pause, context)
 
     return processed_data, "Not sure what to put here"
 
-def refresh_get_invoice_products(date, list_number, on_pause=None):
+def refresh_get_invoice_products(date, list_number, on_pause=None, context=None):
     """
     Main function to refresh and process invoice products for a specific date.
     Creates a new butchers list row in the database instead of updating a JSON blob.
     """
+    context = context or TaskContext()
     invoices_ids = []
     
     invoice_list = []
-    fresh_products_codes = fetch_products_stock_code_fresh()
+    context.set_stage("Loading fresh products")
+    fresh_products_codes = FreshCodeIndex.from_database()
     existing_butchers_lists = fetch_all_butchers_lists_by_date(date)
     processed_data = []
     
@@ -57,42 +69,28 @@ def refresh_get_invoice_products(date, list_number, on_pause=None):
     else:
         previous_fetch = existing_butchers_lists[(list_number - 1)].updated_at.strftime("%Y-%m-%d %H:%M:%S")
 
+    context.check_cancelled()
+    context.set_stage("Fetching invoices")
     invoice_list = refresh_get_todays_invoices(date, original_fetch, previous_fetch)    
+    context.check_cancelled()
 
     if invoice_list and 'results' in invoice_list and invoice_list['results']:
         for invoice in invoice_list['results']:
             if 'invoiceNumber' in invoice:
                 invoices_ids.append(invoice['invoiceNumber'])
         
-        invoice_items = get_invoice_items_id(invoices_ids)
-        processed_data = process_invoices_products(invoice_items, fresh_products_codes, invoice_list['results'])
+        context.set_stage("Fetching invoice items")
+        invoice_items = iter_invoice_items_id(
+            invoices_ids, on_progress=context.progress_callback("Fetching invoice items"), invoices_date=date
+        )
+        processed_data = process_invoices_products(invoice_items, fresh_products_codes, invoice_list['results'], context=context)
     return processed_data, existing_butchers_lists[list_number].id
 
 def check_product_is_fresh(stock_code, fresh_products_codes):
     """
     Check if a product is considered fresh based on its stock code.
     """
-    
-    for fresh_code in fresh_products_codes:
-        try:
-            # Try to parse as JSON first
-            parsed_codes = json.loads(fresh_code)
-            if isinstance(parsed_codes, str):
-                # JSON string value
-                if parsed_codes == stock_code:
-
-                    return True
-            elif isinstance(parsed_codes, list):
-                # JSON array
-                if stock_code in parsed_codes:
-                    return True
-                    
-        except (json.JSONDecodeError, TypeError):
-            # If JSON parsing fails, treat as plain string
-            if isinstance(fresh_code, str) and fresh_code == stock_code:
-                return True
-    
-    return False
+    return FreshCodeIndex.ensure(fresh_products_codes).is_fresh(stock_code)
 
 def create_customer_lookup(butchers_list):
     """
@@ -152,19 +150,45 @@ def finalize_customer_products(butchers_list):
         # Clean up the temporary product_dict
         customer.pop("product_dict", None)
 
-def process_invoices_products(invoices_items, fresh_products_codes=[], invoice_list=[], on_pause=None):
+def index_invoice_items(invoice_items):
+    """
+    Group invoice items by their invoice number in a single pass so each
+    invoice only has to look at its own lines.
+    """
+    items_by_invoice = defaultdict(list)
+
+    if not invoice_items:
+        return items_by_invoice
+
+    for item in invoice_items:
+        invoice_number = item.get("invoiceNumber")
+        if invoice_number is None:
+            continue
+        items_by_invoice[str(invoice_number)].append(item)
+
+    return items_by_invoice
+
+def process_invoices_products(invoices_items, fresh_products_codes=[], invoice_list=[], on_pause=None, context=None):
     """
     Process invoices and update the butchers list with products from invoices,
     identifying customers by name only.
     """
+    context = context or TaskContext()
     butchers_list = []
     
     # Step 1: Build customer lookup
     customer_lookup = create_customer_lookup(butchers_list)
+
+    # Index invoice items once instead of rescanning them for every invoice
+    items_by_invoice = index_invoice_items(invoices_items)
+    fresh_products_codes = FreshCodeIndex.ensure(fresh_products_codes)
+    context.check_cancelled()
     
     # Step 2: Process new invoices
+    context.set_stage("Building butchers list")
     customers_with_fresh_products = set()
     new_customers = []
+    non_fresh_items = {}
     
     for invoice in invoice_list:
         # Get company name from the invoice
@@ -184,8 +208,9 @@ def process_invoices_products(invoices_items, fresh_products_codes=[], invoice_l
               customer_name, customer_lookup, invoice_id, new_customers
           )
           
-          # Process invoice items
-          has_fresh_products = process_invoice_items(invoices_items, customer_entry, fresh_products_codes, invoice_id, on_pause)
+          # Process only this invoice's items
+          invoice_items = items_by_invoice.get(str(invoice_id), [])
+          has_fresh_products = process_invoice_items(invoice_items, customer_entry, fresh_products_codes, invoice_id, non_fresh_items)
           
           # Track customers who have fresh products
           if has_fresh_products:
@@ -200,74 +225,88 @@ def process_invoices_products(invoices_items, fresh_products_codes=[], invoice_l
 
     # Step 3: Finalize products for all customers
     finalize_customer_products(butchers_list)
+    context.check_cancelled()
+
+    # Step 4: Ask the user about every unknown product at once
+    if on_pause and non_fresh_items:
+        missing_products = find_missing_products(non_fresh_items)
+        if missing_products:
+            on_pause({
+                "type": "missing_products",
+                "products": missing_products
+            })
 
     return butchers_list
 
-def process_invoice_items(invoice_products, customer_entry, fresh_products_codes, invoice_id, on_pause=None):
+def process_invoice_items(invoice_products, customer_entry, fresh_products_codes, invoice_id, non_fresh_items=None):
     """
-    Process items in an invoice and update customer's products.
+    Process the items belonging to a single invoice and update customer's products.
+    invoice_products should already be limited to invoice_id (see index_invoice_items).
     All products are aggregated by their stock code and name.
+    Non-fresh stock codes are collected into non_fresh_items (code -> description)
+    so missing products can be checked in one go afterwards.
     """
     has_fresh_products = False
     
     if not invoice_products:
         return has_fresh_products
     
-    # Convert invoice_ids to strings for comparison
-    invoice_ids_as_strings = [str(inv_id) for inv_id in customer_entry["invoice_ids"]]
-    
-    # Process each item once, checking if it belongs to any of this customer's invoices
     for item in invoice_products:
-        product_invoice_number = item.get("invoiceNumber")
         product_description = item.get("description")
         sage_code = item.get("stockCode", "")
-        if product_invoice_number is not None:
-            product_invoice_number = str(product_invoice_number)
+
+        if sage_code is not None:
+            sage_code = str(sage_code).strip()
         else:
-            product_invoice_number = ""
-        
-        # Check if this item belongs to any of this customer's invoices
-        if product_invoice_number == invoice_id:
-            if sage_code is not None:
-                sage_code = str(sage_code).strip()
+            sage_code = ""
+            
+        if check_product_is_fresh(sage_code, fresh_products_codes):
+            has_fresh_products = True
+            
+            name = item.get("description", "")
+            if name is not None:
+                name = str(name).strip()
             else:
-                sage_code = ""
-                
-            if check_product_is_fresh(sage_code, fresh_products_codes):
-                has_fresh_products = True
-                
-                name = item.get("description", "")
-                if name is not None:
-                    name = str(name).strip()
-                else:
-                    name = ""
-                    
-                qty = float(item.get("quantity", 0))
+                name = ""
                 
-                # Aggregate quantities
-                product_key = (sage_code, name)
-                customer_entry["product_dict"][product_key] += qty
-             
-            else:
-                # Pass on_pause callback to find_or_create_product
-                find_or_create_product(sage_code, product_description, on_pause)
+            qty = float(item.get("quantity", 0))
+            
+            # Aggregate quantities
+            product_key = (sage_code, name)
+            customer_entry["product_dict"][product_key] += qty
+         
+        elif non_fresh_items is not None and sage_code not in non_fresh_items:
+            non_fresh_items[sage_code] = product_description
 
     return has_fresh_products
 
-def find_or_create_product(product_sage_code, product_description, on_pause=None):
-    # Search for product in database
-    product = fetch_single_product_stock_code(product_sage_code)
-    
-    if not product or product_sage_code != 'M':
-        # Product not found - trigger pause if callback provided
-        if on_pause:
-            on_pause({
-                "type": "missing_product",
-                "description": product_description,
-                "sage_code": product_sage_code
-            })
-        return False
-    return True
+def find_missing_products(non_fresh_items):
+    """
+    Compare the stock codes seen on the invoices against every code in the
+    products table (one query) and return the ones we don't know about.
+    Returns None if the products couldn't be loaded, rather than reporting
+    every code as missing.
+    """
+    product_sage_codes = fetch_all_product_sage_codes()
+    if product_sage_codes is None:
+        print("Error checking for missing products: couldn't load product codes")
+        return None
+
+    known_codes = set()
+    for sage_code in product_sage_codes:
+        known_codes.update(parse_sage_codes(sage_code))
+
+    missing_products = []
+    for sage_code, product_description in non_fresh_items.items():
+        # 'M' is Sage's miscellaneous line, it never maps to a product
+        if not sage_code or sage_code == 'M' or sage_code in known_codes:
+            continue
+        missing_products.append({
+            "description": product_description,
+            "sage_code": sage_code
+        })
+
+    return missing_products
 
 def add_product_supabase(name, cost, stock_count, product_value, stock_category, product_category, sage_code, supplier, sold_as):
     try:
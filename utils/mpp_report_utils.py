@@ -1,5 +1,6 @@
 import json
 from database.reports import update_report_by_column
+from utils.sage_code_utils import parse_sage_codes
 
 
 def add_customer_mpp_report(report, customer_id):
@@ -80,3 +81,77 @@ def remove_customer_mpp_report(report, customer_id):
     else:
         # Add this return statement for when customer_id is None (user canceled)
         return "Canceled", "No customer selected"
+
+
+def build_unit_of_measurement_index(products):
+    """
+    Map every stock code to the sold_as of the product it belongs to.
+    Built once per report so each invoice line is a dict lookup instead of
+    a scan over every product. The first product listing a code wins, as
+    with the old linear search.
+    """
+    unit_of_measurement_index = {}
+    for product in products or []:
+        for code in parse_sage_codes(product.sage_code):
+            unit_of_measurement_index.setdefault(code, product.sold_as)
+    return unit_of_measurement_index
+
+
+def invoice_number_key(invoice_number):
+    """Sage sends invoice numbers as both strings and ints, compare them as ints."""
+    try:
+        return int(invoice_number)
+    except (TypeError, ValueError):
+        return invoice_number
+
+
+def group_customer_invoices(invoices, customers):
+    """
+    Bucket the week's invoices by the report customer they belong to in one
+    pass. Returns (customer_invoices, invoice_numbers): the invoices keyed by
+    customer sage_code, and every invoice number to fetch items for.
+    """
+    customer_invoices = {customer["sage_code"]: [] for customer in customers}
+    invoice_numbers = []
+    for invoice in invoices:
+        account_invoices = customer_invoices.get(invoice["accountRef"])
+        if account_invoices is not None:
+            account_invoices.append(invoice)
+            invoice_numbers.append(invoice["invoiceNumber"])
+    return customer_invoices, invoice_numbers
+
+
+def group_invoice_items(invoice_items):
+    """Bucket invoice lines by invoice number, keeping Sage's line order."""
+    items_by_invoice = {}
+    for invoice_item in invoice_items:
+        items_by_invoice.setdefault(invoice_number_key(invoice_item["invoiceNumber"]), []).append(invoice_item)
+    return items_by_invoice
+
+
+def get_customer_invoice_items(items_by_invoice, customer_invoices, customers, unit_of_measurement_index):
+    for customer in customers:
+        customer["data"] = []
+        for customer_invoice in customer_invoices[customer["sage_code"]]:
+            invoice_items = items_by_invoice.get(invoice_number_key(customer_invoice["invoiceNumber"]), [])
+            invoice_data = {
+                "invoice_number": customer_invoice["invoiceNumber"],
+                "invoice_date": customer_invoice["invoiceDate"],
+                "invoice_items": [
+                    make_invoice_item_data(invoice_item, unit_of_measurement_index)
+                    for invoice_item in invoice_items
+                ]
+            }
+            customer["data"].append(invoice_data)
+    return customers
+
+
+def make_invoice_item_data(invoice_item, unit_of_measurement_index):
+    return {
+        "product_code": invoice_item["stockCode"],
+        "product_description": invoice_item["description"],
+        "product_unit_price": invoice_item["unitPrice"],
+        "amount": invoice_item["quantity"],
+        "total_price": invoice_item["netAmount"],
+        "unit_of_measurement": unit_of_measurement_index.get(invoice_item["stockCode"])
+    }
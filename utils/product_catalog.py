@@ -0,0 +1,188 @@
+import copy
+import os
+import select
+import threading
+import time
+
+import psycopg2
+from psycopg2 import sql
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+from database import connection as database_connection
+from database.products import fetch_products, add_products_changed_listener
+from utils.sage_code_utils import parse_sage_codes
+
+# Reload the catalogue at least this often (seconds), so edits made on other
+# machines show up even without LISTEN/NOTIFY. 0 keeps it until invalidated.
+PRODUCT_CATALOG_TTL = float(os.getenv('PRODUCT_CATALOG_TTL') or 300)
+# Set PRODUCT_CATALOG_LISTEN=1 once database/schemas/product_catalog_notify.sql is applied
+PRODUCT_CATALOG_LISTEN = (os.getenv('PRODUCT_CATALOG_LISTEN') or "0") == "1"
+PRODUCT_CATALOG_CHANNEL = os.getenv('PRODUCT_CATALOG_CHANNEL') or "products_changed"
+
+
+def _copy_product(product):
+    # Edits to a returned product must not leak into the shared cache
+    return copy.copy(product) if product is not None else None
+
+
+class ProductCatalog:
+    """
+    In-memory copy of the products table with lookups by id, sage code,
+    stock category and name.
+
+    Loaded on first use and reloaded after insert_product / update_product /
+    stock count updates, after ttl seconds, or when Postgres sends a
+    NOTIFY on the products channel. Lookups hand out copies of the cached
+    products, so an unsaved edit in one window isn't seen by the others.
+    """
+
+    def __init__(self, ttl=PRODUCT_CATALOG_TTL):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._loaded_at = None
+        # Bumped on every invalidate, so a reload racing a change isn't marked fresh
+        self._generation = 0
+        self._products = []
+        self._by_id = {}
+        self._by_sage_code = {}
+        self._by_stock_category = {}
+        self._by_name = {}
+
+        self._listen_thread = None
+        self._stop_listening = threading.Event()
+
+        add_products_changed_listener(self.invalidate)
+
+    def _is_stale(self):
+        if self._loaded_at is None:
+            return True
+        return bool(self.ttl) and time.monotonic() - self._loaded_at > self.ttl
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if self._is_stale():
+                self.refresh()
+
+    def refresh(self):
+        """Reload every product and rebuild the indexes."""
+        generation = self._generation
+        products = fetch_products()
+        if products is None:
+            # Database unreachable, keep whatever we had and try again next time
+            return
+
+        by_id = {}
+        by_sage_code = {}
+        by_stock_category = {}
+        by_name = {}
+        for product in products:
+            by_id[product.id] = product
+            by_name.setdefault(product.name, product)
+            by_stock_category.setdefault(product.stock_category, []).append(product)
+            for code in parse_sage_codes(product.sage_code):
+                # First product listing a code wins, same as a linear search would
+                by_sage_code.setdefault(code, product)
+
+        with self._lock:
+            self._products = products
+            self._by_id = by_id
+            self._by_sage_code = by_sage_code
+            self._by_stock_category = by_stock_category
+            self._by_name = by_name
+            if generation == self._generation:
+                self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        """Drop the cached products, the next lookup reloads them."""
+        with self._lock:
+            self._generation += 1
+            self._loaded_at = None
+
+    def products(self):
+        """
+        Every product ordered by name. The list and the products in it are
+        copies, so callers may sort, filter or edit them without touching the cache.
+        """
+        self._ensure_loaded()
+        return [copy.copy(product) for product in self._products]
+
+    def get_by_id(self, product_id):
+        self._ensure_loaded()
+        return _copy_product(self._by_id.get(product_id))
+
+    def get_by_sage_code(self, sage_code):
+        self._ensure_loaded()
+        if sage_code is None:
+            return None
+        return _copy_product(self._by_sage_code.get(str(sage_code).strip()))
+
+    def get_by_name(self, name):
+        self._ensure_loaded()
+        return _copy_product(self._by_name.get(name))
+
+    def by_stock_category(self, stock_category):
+        self._ensure_loaded()
+        return [copy.copy(product) for product in self._by_stock_category.get(stock_category, [])]
+
+    def id_to_name(self):
+        self._ensure_loaded()
+        return {product_id: product.name for product_id, product in self._by_id.items()}
+
+    def start_listening(self, channel=PRODUCT_CATALOG_CHANNEL):
+        """Invalidate the catalogue whenever Postgres sends NOTIFY on channel."""
+        if self._listen_thread and self._listen_thread.is_alive():
+            return
+        self._stop_listening.clear()
+        self._listen_thread = threading.Thread(target=self._listen, args=(channel,), daemon=True)
+        self._listen_thread.start()
+
+    def stop_listening(self):
+        self._stop_listening.set()
+
+    def _listen(self, channel):
+        # LISTEN needs its own session, so this connection stays out of the pool
+        while not self._stop_listening.is_set():
+            listen_connection = None
+            try:
+                listen_connection = psycopg2.connect(
+                    host=database_connection.DB_HOST,
+                    port=database_connection.DB_PORT,
+                    dbname=database_connection.DB_NAME,
+                    user=database_connection.DB_USER,
+                    password=database_connection.DB_PASSWORD
+                )
+                listen_connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                cursor = listen_connection.cursor()
+                cursor.execute(sql.SQL("LISTEN {}").format(sql.Identifier(channel)))
+                # Anything may have changed while we weren't listening
+                self.invalidate()
+
+                while not self._stop_listening.is_set():
+                    if select.select([listen_connection], [], [], 5) == ([], [], []):
+                        continue
+                    listen_connection.poll()
+                    if listen_connection.notifies:
+                        listen_connection.notifies.clear()
+                        self.invalidate()
+            except Exception as e:
+                print(f"Product catalogue listener error: {e}")
+                self._stop_listening.wait(30)
+            finally:
+                if listen_connection:
+                    listen_connection.close()
+
+
+_product_catalog = None
+_product_catalog_lock = threading.Lock()
+
+
+def get_product_catalog():
+    """Return the process-wide ProductCatalog, creating it on first use."""
+    global _product_catalog
+    if _product_catalog is None:
+        with _product_catalog_lock:
+            if _product_catalog is None:
+                _product_catalog = ProductCatalog()
+                if PRODUCT_CATALOG_LISTEN:
+                    _product_catalog.start_listening()
+    return _product_catalog
@@ -0,0 +1,71 @@
+import json
+
+from database.products import fetch_products_stock_code_fresh
+
+
+def parse_sage_codes(sage_code):
+    """
+    Flatten a products.sage_code cell into a list of stock codes.
+    The cell can be a JSON array, a JSON string or a plain string.
+    """
+    if not sage_code:
+        return []
+
+    if isinstance(sage_code, list):
+        return [str(code).strip() for code in sage_code if code]
+
+    if not isinstance(sage_code, str):
+        return [str(sage_code).strip()]
+
+    try:
+        parsed_codes = json.loads(sage_code)
+    except json.JSONDecodeError:
+        # Not JSON, treat as a single plain code
+        return [sage_code.strip()]
+
+    if isinstance(parsed_codes, list):
+        return [str(code).strip() for code in parsed_codes if code]
+    if isinstance(parsed_codes, str):
+        return [parsed_codes.strip()] if parsed_codes else []
+
+    # Numbers etc. - keep the code exactly as it was stored
+    return [sage_code.strip()]
+
+
+class FreshCodeIndex:
+    """
+    Set of every stock code that belongs to a fresh product.
+    Built once per pull so each invoice line is a single set lookup
+    instead of re-parsing every products.sage_code cell.
+    """
+
+    def __init__(self, sage_codes=None):
+        codes = set()
+        for sage_code in sage_codes or []:
+            codes.update(parse_sage_codes(sage_code))
+        self.codes = frozenset(codes)
+
+    @classmethod
+    def from_database(cls):
+        return cls(fetch_products_stock_code_fresh())
+
+    @classmethod
+    def ensure(cls, fresh_products_codes):
+        """Return fresh_products_codes as an index, building one if needed."""
+        if isinstance(fresh_products_codes, cls):
+            return fresh_products_codes
+        return cls(fresh_products_codes)
+
+    def is_fresh(self, stock_code):
+        if stock_code is None:
+            return False
+        return str(stock_code).strip() in self.codes
+
+    def __contains__(self, stock_code):
+        return self.is_fresh(stock_code)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __iter__(self):
+        return iter(self.codes)
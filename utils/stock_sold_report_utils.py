@@ -1,7 +1,9 @@
 import json
-from controllers.sage_controllers.invoice_products import get_invoice_items_id
+from controllers.sage_controllers.invoice_products import iter_invoice_items_id
 from controllers.sage_controllers.invoices import get_todays_invoices
 from database.reports import update_report
+from utils.sage_code_utils import parse_sage_codes
+from utils.task_context import TaskContext
 
 
 def add_product_stock_sold_report(report, product_id): 
@@ -90,27 +92,7 @@ def create_sage_codes_array(products):
     all_codes = []
     
     for product in products:
-        sage_code = product.sage_code
-        
-        if sage_code:  # Check if sage_code is not None or empty
-            if isinstance(sage_code, str):
-                try:
-                    # Try to parse as JSON array first
-                    parsed_codes = json.loads(sage_code)
-                    if isinstance(parsed_codes, list):
-                        all_codes.extend(parsed_codes)
-                    else:
-                        # If it's not a list after parsing, treat as single code
-                        all_codes.append(str(parsed_codes))
-                except json.JSONDecodeError:
-                    # If JSON parsing fails, treat as single code
-                    all_codes.append(sage_code)
-            elif isinstance(sage_code, list):
-                # If it's already a list, extend directly
-                all_codes.extend(sage_code)
-            else:
-                # For any other type, convert to string and add
-                all_codes.append(str(sage_code))
+        all_codes.extend(parse_sage_codes(product.sage_code))
     
     # Remove duplicates while preserving order
     unique_codes = []
@@ -122,24 +104,31 @@ def create_sage_codes_array(products):
     
     return unique_codes
 
-def fetch_chosen_dates_invoice_items(date, report_products):
+def fetch_chosen_dates_invoice_items(date, report_products, on_pause=None, context=None):
+    context = context or TaskContext()
     invoices_ids = []
     
     invoice_list = []
     processed_data = []
     
     # Get appropriate invoices based on whether we have an existing list
+    context.set_stage("Fetching invoices")
     invoice_list = get_todays_invoices(date)
+    context.check_cancelled()
     
     if invoice_list and 'results' in invoice_list and invoice_list['results']:
         for invoice in invoice_list['results']:
             if 'invoiceNumber' in invoice:
                 invoices_ids.append(invoice['invoiceNumber'])
         
-        # Process invoices and create new butchers list
-        invoice_items = get_invoice_items_id(invoices_ids)
+        # Stream the invoice items straight into processing, page by page
+        context.set_stage("Fetching invoice items")
+        invoice_items = iter_invoice_items_id(
+            invoices_ids, on_progress=context.progress_callback("Fetching invoice items"), invoices_date=date
+        )
 
-        processed_data = process_invoices_products(invoice_items['results'], report_products, invoices_ids)
+        processed_data = process_invoices_products(invoice_items, report_products, invoices_ids)
+        context.check_cancelled()
 
     return processed_data, "Not sure what to put here"
 
@@ -148,18 +137,19 @@ def process_invoices_products(invoice_items, report_products, invoices_ids):
     product_sold_count = {}
     selected_dates_invoice_items = process_invoice_items(invoice_items, invoices_ids)
     
+    # Map every stock code to the report products it belongs to
+    products_by_code = {}
     for product in report_products:
         product_sold_count[product.name] = 0
-        
-        # Parse sage codes for this product
-        try:
-            sage_codes = json.loads(product.sage_code)
-        except json.JSONDecodeError:
-            sage_codes = [product.sage_code]
-        
-        for invoice_item in selected_dates_invoice_items:
-            if invoice_item['stockCode'] in sage_codes:
-                product_sold_count[product.name] += invoice_item['quantity']
+        # A code listed twice on one product must still count each sale once
+        for sage_code in dict.fromkeys(parse_sage_codes(product.sage_code)):
+            products_by_code.setdefault(sage_code, []).append(product.name)
+    
+    for invoice_item in selected_dates_invoice_items:
+        # Product codes are stripped by parse_sage_codes, so strip Sage's too
+        stock_code = str(invoice_item['stockCode'] or "").strip()
+        for product_name in products_by_code.get(stock_code, []):
+            product_sold_count[product_name] += invoice_item['quantity']
 
     return product_sold_count
 
@@ -169,11 +159,11 @@ def process_invoice_items(invoice_items, invoices_ids):
     
     # Convert invoices_ids to handle both string and integer types
     try:
-        invoices_ids_int = [int(id) for id in invoices_ids]
-        invoices_ids_str = [str(id) for id in invoices_ids_int]
+        invoices_ids_int = {int(id) for id in invoices_ids}
+        invoices_ids_str = {str(id) for id in invoices_ids_int}
     except (ValueError, TypeError):
-        invoices_ids_int = invoices_ids
-        invoices_ids_str = [str(id) for id in invoices_ids]
+        invoices_ids_int = set(invoices_ids)
+        invoices_ids_str = {str(id) for id in invoices_ids}
 
     for invoice_item in invoice_items:
         invoice_num = invoice_item['invoiceNumber']
@@ -0,0 +1,68 @@
+import inspect
+import threading
+
+
+def accepts_keyword(function, name):
+    """True if function can be called with the keyword argument name."""
+    try:
+        parameters = inspect.signature(function).parameters
+    except (TypeError, ValueError):
+        return False
+    return name in parameters or any(
+        parameter.kind == inspect.Parameter.VAR_KEYWORD for parameter in parameters.values()
+    )
+
+
+class TaskCancelled(Exception):
+    """Raised inside a background task once the user has cancelled it."""
+
+
+class TaskContext:
+    """
+    Handed to background tasks that take a context argument.
+
+    The task reports (done, total, stage) through it and checks it for
+    cancellation between steps. Cancellation is cooperative: cancel() only
+    sets a flag, the task stops at its next check_cancelled(). A context
+    built without callbacks does nothing, so tasks can default to one when
+    they're called outside the GUI.
+    """
+
+    def __init__(self, on_progress=None, on_stage=None):
+        self._on_progress = on_progress
+        self._on_stage = on_stage
+        self._cancelled = threading.Event()
+        self.stage = ""
+
+    def report(self, done, total, stage=None):
+        """Report progress, total 0 means the stage has no measurable size."""
+        if stage is not None and stage != self.stage:
+            self.stage = stage
+            if self._on_stage:
+                self._on_stage(stage)
+        if self._on_progress:
+            self._on_progress(done, total)
+
+    def set_stage(self, stage):
+        self.report(0, 0, stage)
+
+    def progress_callback(self, stage=None):
+        """
+        An on_progress(done, total) callback for chunked fetches. Every call
+        is also a cancellation point, so a cancel stops the remaining chunks.
+        """
+        def on_progress(done, total):
+            self.report(done, total, stage)
+            self.check_cancelled()
+        return on_progress
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def check_cancelled(self):
+        if self._cancelled.is_set():
+            raise TaskCancelled()